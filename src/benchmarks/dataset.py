@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import random
+
+
+class SyntheticTweet:
+    """A generated tweet shared by the search page and vxtwitter stubs"""
+    __slots__ = ("tweet_id", "username", "created_at", "text", "media_urls")
+
+    def __init__(self, tweet_id: int, username: str, created_at: datetime, text: str, media_urls: List[str]):
+        self.tweet_id = tweet_id
+        self.username = username
+        self.created_at = created_at
+        self.text = text
+        self.media_urls = media_urls
+
+    def to_vxtwitter(self) -> Dict:
+        """Render the tweet the way api.vxtwitter.com returns it"""
+        return {
+            "tweetID": str(self.tweet_id),
+            "user_screen_name": self.username,
+            "user_name": self.username.title(),
+            "date": self.created_at.strftime('%a %b %d %H:%M:%S %z %Y'),
+            "date_epoch": int(self.created_at.timestamp()),
+            "text": self.text,
+            "mediaURLs": self.media_urls,
+            "likes": 0,
+            "retweets": 0,
+            "replies": 0,
+            "tweetURL": f"https://twitter.com/{self.username}/status/{self.tweet_id}"
+        }
+
+
+class SyntheticDataset:
+    """Deterministic set of accounts and tweets, newest first per account"""
+
+    def __init__(self, accounts: List[str], tweets_per_account: int, days: int = 10, media_ratio: float = 0.3, seed: int = 42):
+        self.accounts = [username.strip('@').lower() for username in accounts]
+        self.days = days
+        self._by_account: Dict[str, List[SyntheticTweet]] = {}
+        self._by_id: Dict[int, SyntheticTweet] = {}
+
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        # Spread the tweets across the crawl window so the scraper reaches its cutoff
+        step = timedelta(days=days) / max(tweets_per_account, 1)
+        next_id = 1800000000000000000
+
+        for username in self.accounts:
+            ids = []
+            for _ in range(tweets_per_account):
+                next_id += rng.randint(1000, 100000)
+                ids.append(next_id)
+
+            # Higher ids are newer, like real snowflake ids
+            tweets = []
+            for position, tweet_id in enumerate(reversed(ids)):
+                media = [f"https://pbs.twimg.com/media/{tweet_id}.jpg"] if rng.random() < media_ratio else []
+                tweets.append(SyntheticTweet(
+                    tweet_id=tweet_id,
+                    username=username,
+                    created_at=now - step * (position + 1),
+                    text=f"Synthetic tweet {position} from @{username} about release {rng.randint(1, 500)} #tech",
+                    media_urls=media
+                ))
+            self._by_account[username] = tweets
+            self._by_id.update({tweet.tweet_id: tweet for tweet in tweets})
+
+    def timeline(self, username: str, max_id: Optional[int] = None) -> List[SyntheticTweet]:
+        tweets = self._by_account.get(username.lower(), [])
+        if max_id is not None:
+            tweets = [tweet for tweet in tweets if tweet.tweet_id <= max_id]
+        return tweets
+
+    def get(self, tweet_id: int) -> Optional[SyntheticTweet]:
+        return self._by_id.get(tweet_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+def synthetic_crawl(accounts: int, tweets: int) -> Iterator[Tuple[str, int, datetime, Dict]]:
+    """
+    Yield (account, tweet id, date, vxtwitter response) for `tweets` tweets spread over `accounts` accounts
+    named bench_account_<n>, without keeping anything alive itself, for the memory and transform benchmarks
+    """
+    now = datetime.now(timezone.utc)
+    per_account = tweets // accounts
+    for account_index in range(accounts):
+        username = f"bench_account_{account_index}"
+        for position in range(per_account):
+            tweet_id = 1_800_000_000_000_000_000 + account_index * 10_000_000 + position
+            created_at = now - timedelta(minutes=position)
+            yield username, tweet_id, created_at, {
+                "tweetID": str(tweet_id),
+                "user_screen_name": username,
+                "user_name": username.title(),
+                "date": created_at.strftime('%a %b %d %H:%M:%S %z %Y'),
+                "date_epoch": int(created_at.timestamp()),
+                "text": f"Synthetic tweet {position} from @{username} about release {position % 500} #tech",
+                "mediaURLs": [f"https://pbs.twimg.com/media/{tweet_id}.jpg"] if position % 3 == 0 else [],
+                "likes": 0,
+                "retweets": 0,
+                "replies": 0,
+                "tweetURL": f"https://twitter.com/{username}/status/{tweet_id}"
+            }
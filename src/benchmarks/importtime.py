@@ -0,0 +1,88 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Entry point -> (budget in milliseconds, modules it must not import eagerly)
+IMPORT_BUDGETS: Dict[str, Tuple[float, List[str]]] = {
+    "src.services.cli.main": (100.0, ["sqlalchemy", "pydantic", "httpx", "playwright", "rich"]),
+    "src.services.cli.tools": (200.0, ["sqlalchemy", "httpx", "playwright"]),
+    "src.database.db": (30.0, ["sqlalchemy", "pydantic", "dotenv"]),
+    "src.utils.common": (30.0, ["sqlalchemy", "httpx"]),
+    "src.services.crawler.twitter": (1000.0, ["playwright"]),
+}
+
+# Stdlib module timed next to the entry points, (module, its import time in ms on the machine the budgets
+# were set on). A slower or busier machine scales every budget by how much slower the reference imported.
+REFERENCE_MODULE: Tuple[str, float] = ("asyncio", 40.0)
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure(module: str, runs: int = 3) -> Tuple[float, List[str]]:
+    """Import `module` in fresh interpreters and return the best cumulative time in ms and the modules it imported"""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    best = None
+    imported: List[str] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stderr
+        imported = []
+        cumulative = None
+        for line in output.splitlines():
+            match = _LINE.match(line)
+            if not match:
+                continue
+            imported.append(match.group(4))
+            if match.group(4) == module:
+                cumulative = int(match.group(2)) / 1000
+        if cumulative is not None and (best is None or cumulative < best):
+            best = cumulative
+    return best or 0.0, imported
+
+
+def budget_scale(runs: int = 3, reference: Tuple[str, float] = REFERENCE_MODULE) -> float:
+    """How much slower than the reference machine this one imports, budgets are never tightened below 1x"""
+    module, reference_ms = reference
+    elapsed_ms, _ = measure(module, runs)
+    return max(1.0, elapsed_ms / reference_ms)
+
+
+def check(budgets: Dict[str, Tuple[float, List[str]]] = IMPORT_BUDGETS, runs: int = 3) -> List[str]:
+    """Return one message per violated budget, an empty list means every entry point is within budget"""
+    failures = []
+    scale = budget_scale(runs)
+    if scale > 1.0:
+        print(f"{REFERENCE_MODULE[0]} imports {scale:.1f}x slower than on the reference machine, budgets are scaled to match")
+    for module, (budget_ms, forbidden) in budgets.items():
+        budget_ms *= scale
+        elapsed_ms, imported = measure(module, runs)
+        leaked = sorted({name.split(".")[0] for name in imported} & set(forbidden))
+        status = "ok"
+        if elapsed_ms > budget_ms:
+            failures.append(f"{module} imports in {elapsed_ms:.1f}ms, budget is {budget_ms:.1f}ms")
+            status = "over budget"
+        if leaked:
+            failures.append(f"{module} eagerly imports {', '.join(leaked)}")
+            status = "leaks heavy imports"
+        print(f"{module:<32} {elapsed_ms:8.1f}ms / {budget_ms:.0f}ms  {status}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check entry point import times with python -X importtime")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreter runs per module, the best one counts")
+    args = parser.parse_args(argv)
+
+    failures = check(runs=args.runs)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+from typing import Dict
+
+from src.benchmarks.dataset import synthetic_crawl
+
+VARIANTS = ["legacy", "compact"]
+
+
+def _rss_mb() -> float:
+    # /proc gives the current RSS, ru_maxrss only the peak and only in kilobytes on Linux
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _build_legacy(accounts: int, tweets: int):
+    """The crawl and fetch stages as they were, a pydantic model per found tweet and the raw response per fetch"""
+    from src.database.models.pydantic_models import TweetDetails
+
+    found: Dict[str, list] = {}
+    fetched: Dict[str, list] = {}
+    for username, tweet_id, created_at, response in synthetic_crawl(accounts, tweets):
+        found.setdefault(username, []).append(TweetDetails(id=str(tweet_id), date=created_at))
+        fetched.setdefault(username, []).append(response)
+    return found, fetched
+
+
+def _build_compact(accounts: int, tweets: int):
+    from src.services.crawler.records import FetchedTweet, FoundTweets
+
+    found: Dict[str, FoundTweets] = {}
+    fetched: Dict[str, list] = {}
+    for username, tweet_id, created_at, response in synthetic_crawl(accounts, tweets):
+        found.setdefault(username, FoundTweets()).append(tweet_id, int(created_at.timestamp()))
+        fetched.setdefault(username, []).append(FetchedTweet.from_vxtwitter(response))
+    return found, fetched
+
+
+def measure_variant(variant: str, accounts: int, tweets: int) -> Dict[str, float]:
+    """Build one variant in this process and return how much resident memory it holds on to"""
+    builder = _build_legacy if variant == "legacy" else _build_compact
+    # Import everything first so only the data structures show up in the difference
+    builder(1, 1)
+    gc.collect()
+    before = _rss_mb()
+    data = builder(accounts, tweets)
+    gc.collect()
+    after = _rss_mb()
+    del data
+    return {"variant": variant, "tweets": tweets, "rss_mb": round(after - before, 1), "bytes_per_tweet": round((after - before) * 1024 * 1024 / tweets)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the memory held by the crawl and fetch stages per tweet representation")
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--tweets", type=int, default=200_000, help="Tweets across all accounts")
+    parser.add_argument("--variant", choices=VARIANTS, help="Measure a single variant in this process")
+    args = parser.parse_args(argv)
+
+    if args.variant:
+        print(json.dumps(measure_variant(args.variant, args.accounts, args.tweets)))
+        return
+
+    # Every variant runs in a fresh interpreter so freed memory of one does not hide the other
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    results = []
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, "-m", "src.benchmarks.memory", "--variant", variant, "--accounts", str(args.accounts), "--tweets", str(args.tweets)],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output))
+    for result in results:
+        print(f"{result['variant']:<8} {result['rss_mb']:8.1f}MB  {result['bytes_per_tweet']:6d} bytes/tweet")
+    legacy, compact = results
+    if compact["rss_mb"]:
+        print(f"compact holds {legacy['rss_mb'] / compact['rss_mb']:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
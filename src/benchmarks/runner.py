@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.benchmarks.dataset import SyntheticDataset
+from src.benchmarks.twitter_stub import TwitterStubServer
+from src.benchmarks.vxtwitter_stub import VxTwitterStubServer
+from src.database.base import Base
+from src.database.db import build_engine
+from src.database.models.models import Category, Tweet, TwitterAccount, twitter_account_categories
+from src.database.models.pydantic_models import BenchmarkConfig, BenchmarkResult, TwitterCredentials, LoggingConfig, DBConfig, DedupConfig, PipelineConfig
+from src.database.repositories.repositories import TweetRepository
+from src.core.logging_config import setup_logging
+from src.services.crawler.records import FoundTweets
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticScraper:
+    """Stands in for TwitterScraper when no browser is available, returns the dataset ids directly"""
+
+    def __init__(self, dataset: SyntheticDataset):
+        self.dataset = dataset
+
+    async def initial_scrape(self) -> Dict[str, FoundTweets]:
+        found = {}
+        for username in self.dataset.accounts:
+            found[username] = FoundTweets()
+            for tweet in self.dataset.timeline(username):
+                found[username].append(tweet.tweet_id, int(tweet.created_at.timestamp()))
+        return found
+
+
+def _max_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss / divisor
+
+
+def _ms(value):
+    return round(value * 1000, 3) if value is not None else None
+
+
+async def _seed(session: AsyncSession, accounts: List[str]):
+    category = Category(name="benchmark", description="Synthetic benchmark accounts", is_active=True)
+    session.add(category)
+    session.add_all([TwitterAccount(username=username, display_name=username, is_active=True) for username in accounts])
+    await session.flush()
+
+    account_ids = (await session.execute(select(TwitterAccount.id))).scalars().all()
+    await session.execute(
+        insert(twitter_account_categories),
+        [{"twitter_account_id": account_id, "category_id": category.id} for account_id in account_ids]
+    )
+    await session.commit()
+
+
+async def run_benchmark(config: BenchmarkConfig) -> BenchmarkResult:
+    from src.services.crawler.twitter import TwitterAuth, TwitterScraper, TweetProcessor
+
+    dataset = SyntheticDataset(
+        accounts=[f"bench_account_{index}" for index in range(config.accounts)],
+        tweets_per_account=config.tweets_per_account,
+        days=config.days
+    )
+    twitter_stub = TwitterStubServer(dataset, config.initial_count, config.batch_size, config.load_delay_ms)
+    vx_stub = VxTwitterStubServer(dataset, config.latency_ms, config.jitter_ms, config.error_rate)
+    twitter_stub.start()
+    vx_stub.start()
+
+    metrics.REGISTRY.enabled = True
+    metrics.REGISTRY.reset()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = build_engine(DBConfig(db_url=f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.sqlite3')}"))
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+            async with session_factory() as session:
+                await _seed(session, dataset.accounts)
+
+                tweet_repo = TweetRepository(Tweet, session)
+
+                if config.skip_browser:
+                    scraper = SyntheticScraper(dataset)
+                else:
+                    auth = TwitterAuth(TwitterCredentials(username="bench", password="bench", email="bench@example.com"), settle_delay=0)
+                    scraper = TwitterScraper(
+                        auth, tweet_repo, dataset.accounts, config.days,
+                        headless=config.headless, base_url=twitter_stub.base_url
+                    )
+                processor = TweetProcessor(
+                    scraper, session_factory, twitter_api=vx_stub.status_url, dedup_config=DedupConfig(),
+                    pipeline_config=PipelineConfig(fetch_concurrency=config.fetch_concurrency, account_concurrency=config.account_concurrency)
+                )
+
+                start = time.perf_counter()
+                await processor.process_tweets()
+                elapsed = time.perf_counter() - start
+
+                stored = (await session.execute(select(func.count(Tweet.id)))).scalar_one()
+        finally:
+            await engine.dispose()
+            twitter_stub.stop()
+            vx_stub.stop()
+
+    return BenchmarkResult(
+        tweets_expected=len(dataset),
+        tweets_stored=stored,
+        fetch_errors=vx_stub.errors,
+        elapsed_seconds=round(elapsed, 3),
+        tweets_per_second=round(stored / elapsed, 2) if elapsed else 0.0,
+        fetch_p50_ms=_ms(metrics.FETCH_SECONDS.quantile(0.5)),
+        fetch_p99_ms=_ms(metrics.FETCH_SECONDS.quantile(0.99)),
+        insert_p50_ms=_ms(metrics.DB_INSERT_SECONDS.quantile(0.5)),
+        insert_p99_ms=_ms(metrics.DB_INSERT_SECONDS.quantile(0.99)),
+        dedup_p50_ms=_ms(metrics.DEDUP_SECONDS.quantile(0.5)),
+        dedup_p99_ms=_ms(metrics.DEDUP_SECONDS.quantile(0.99)),
+        peak_rss_mb=round(_max_rss_mb(resource.RUSAGE_SELF), 1),
+        peak_children_rss_mb=round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1)
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    defaults = BenchmarkConfig()
+    parser.add_argument("--accounts", type=int, default=defaults.accounts)
+    parser.add_argument("--tweets-per-account", type=int, default=defaults.tweets_per_account)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--initial-count", type=int, default=defaults.initial_count, help="Tweets rendered before the first scroll")
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size, help="Tweets lazy loaded per scroll")
+    parser.add_argument("--load-delay-ms", type=int, default=defaults.load_delay_ms, help="Delay of each lazy load request")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="vxtwitter response latency")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of vxtwitter requests answered with HTTP 500")
+    parser.add_argument("--fetch-concurrency", type=int, default=defaults.fetch_concurrency, help="vxtwitter requests in flight")
+    parser.add_argument("--account-concurrency", type=int, default=defaults.account_concurrency, help="Accounts fetched and stored at once")
+    parser.add_argument("--skip-browser", action="store_true", help="Skip Playwright and feed the dataset ids straight to the processor")
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    parser.add_argument("--output", help="Write the result as JSON to this path")
+    return parser
+
+
+def build_parser() -> argparse.ArgumentParser:
+    return add_arguments(argparse.ArgumentParser(description="Offline end to end benchmark against local Twitter and vxtwitter stubs"))
+
+
+def config_from_args(args: argparse.Namespace) -> BenchmarkConfig:
+    return BenchmarkConfig(
+        accounts=args.accounts,
+        tweets_per_account=args.tweets_per_account,
+        days=args.days,
+        initial_count=args.initial_count,
+        batch_size=args.batch_size,
+        load_delay_ms=args.load_delay_ms,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        fetch_concurrency=args.fetch_concurrency,
+        account_concurrency=args.account_concurrency,
+        skip_browser=args.skip_browser,
+        headless=not args.headed
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging(LoggingConfig(level="WARNING", rate_limited_modules=["src.services.crawler", "src.utils.common"]))
+    result = asyncio.run(run_benchmark(config_from_args(args)))
+    output = json.dumps(result.model_dump(), indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from src.benchmarks.dataset import synthetic_crawl
+from src.services.crawler.records import FetchedTweet, tweet_rows
+
+
+def _fetched(accounts: int, tweets: int, with_epoch: bool) -> Tuple[List[FetchedTweet], Dict[str, Tuple[int, int]]]:
+    fetched = []
+    for _, _, _, response in synthetic_crawl(accounts, tweets):
+        if not with_epoch:
+            del response["date_epoch"]
+        fetched.append(FetchedTweet.from_vxtwitter(response))
+    mapping = {f"bench_account_{index}": (index + 1, 1) for index in range(accounts)}
+    return fetched, mapping
+
+
+def _legacy_objects(tweets: List[FetchedTweet], mapping: Dict[str, Tuple[int, int]]) -> list:
+    """The transform as it was, strptime per tweet and an ORM instance per row"""
+    from src.database.models.models import Tweet
+
+    objects = []
+    for tweet in tweets:
+        account_id, category_id = mapping[tweet.username]
+        created_at = datetime.strptime(tweet.date, '%a %b %d %H:%M:%S %z %Y').astimezone(timezone.utc)
+        objects.append(Tweet(
+            twitter_id=tweet.tweet_id, account_id=int(account_id), category_id=int(category_id),
+            text=tweet.text, media_urls=tweet.media_urls, created_at=created_at
+        ))
+    return objects
+
+
+def _best_rate(transform: Callable[[], list], rows: int, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transform()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+
+async def _insert_rates(tweets: List[FetchedTweet], mapping: Dict[str, Tuple[int, int]], accounts: int) -> Dict[str, float]:
+    """Transform plus insert into a scratch SQLite database, ORM create_all against the core executemany"""
+    from sqlalchemy import delete
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    from src.database.base import Base
+    from src.database.db import build_engine
+    from src.database.models.models import Category, Tweet, TwitterAccount
+    from src.database.models.pydantic_models import DBConfig
+    from src.database.repositories.repositories import TweetRepository
+
+    rates = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = build_engine(DBConfig(db_url=f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'transform.sqlite3')}"))
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with session_factory() as session:
+                session.add(Category(id=1, name="benchmark", description="Transform benchmark", is_active=True))
+                session.add_all([TwitterAccount(id=index + 1, username=f"bench_account_{index}") for index in range(accounts)])
+                await session.commit()
+
+            for name in ("legacy", "rows"):
+                async with session_factory() as session:
+                    repo = TweetRepository(Tweet, session)
+                    start = time.perf_counter()
+                    if name == "legacy":
+                        await repo.create_all(_legacy_objects(tweets, mapping))
+                    else:
+                        await repo.insert_rows(tweet_rows(tweets, mapping)[0])
+                    rates[name] = len(tweets) / (time.perf_counter() - start)
+                    await session.execute(delete(Tweet))
+                    await session.commit()
+        finally:
+            await engine.dispose()
+    return rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare tweet transform throughput before and after the batch row path")
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--tweets", type=int, default=100_000, help="Tweets across all accounts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant, the fastest counts")
+    parser.add_argument("--insert", action="store_true", help="Also time transform plus insert into a scratch SQLite database")
+    args = parser.parse_args(argv)
+
+    with_epoch, mapping = _fetched(args.accounts, args.tweets, with_epoch=True)
+    without_epoch, _ = _fetched(args.accounts, args.tweets, with_epoch=False)
+    count = len(with_epoch)
+
+    rates = {
+        "legacy (strptime + ORM)": _best_rate(lambda: _legacy_objects(with_epoch, mapping), count, args.repeat),
+        "rows (date parser)": _best_rate(lambda: tweet_rows(without_epoch, mapping), count, args.repeat),
+        "rows (date_epoch)": _best_rate(lambda: tweet_rows(with_epoch, mapping), count, args.repeat),
+    }
+    baseline = rates["legacy (strptime + ORM)"]
+    for name, rate in rates.items():
+        print(f"{name:<26} {rate:>12,.0f} rows/s  {rate / baseline:5.1f}x")
+
+    if args.insert:
+        inserted = asyncio.run(_insert_rates(with_epoch, mapping, args.accounts))
+        for name, rate in inserted.items():
+            print(f"insert {name:<19} {rate:>12,.0f} rows/s  {rate / inserted['legacy']:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
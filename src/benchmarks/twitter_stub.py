@@ -0,0 +1,142 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from html import escape
+from typing import Optional, List
+import json
+import re
+import threading
+import time
+import logging
+
+from src.benchmarks.dataset import SyntheticDataset, SyntheticTweet
+
+logger = logging.getLogger(__name__)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>Search / X</title>
+<style>article {{ display: block; min-height: 220px; border-bottom: 1px solid #ccc; }}</style>
+</head>
+<body>
+<nav><a data-testid="AppTabBar_Home_Link" href="/home">Home</a></nav>
+<main id="timeline">{articles}</main>
+<script>
+  let cursor = {cursor};
+  let loading = false;
+  const user = {user};
+  const maxId = {max_id};
+  async function loadMore() {{
+    if (loading || cursor === null) return;
+    loading = true;
+    const params = new URLSearchParams({{user: user, cursor: cursor}});
+    if (maxId !== null) params.set('max_id', maxId);
+    const response = await fetch('/timeline?' + params.toString());
+    const body = await response.json();
+    document.getElementById('timeline').insertAdjacentHTML('beforeend', body.html);
+    cursor = body.cursor;
+    loading = false;
+  }}
+  window.addEventListener('scroll', () => {{
+    if (window.innerHeight + window.scrollY >= document.body.offsetHeight - 1500) loadMore();
+  }});
+</script>
+</body>
+</html>"""
+
+
+def render_article(tweet: SyntheticTweet) -> str:
+    timestamp = tweet.created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    return (
+        f'<article data-testid="tweet">'
+        f'<a href="/{tweet.username}">@{tweet.username}</a> '
+        f'<a href="/{tweet.username}/status/{tweet.tweet_id}"><time datetime="{timestamp}">{timestamp}</time></a>'
+        f'<div data-testid="tweetText">{escape(tweet.text)}</div>'
+        f'</article>'
+    )
+
+
+class TwitterStubServer:
+    """Local stand-in for the twitter.com live search timeline with scroll-triggered lazy loading"""
+
+    def __init__(self, dataset: SyntheticDataset, initial_count: int = 20, batch_size: int = 20, load_delay_ms: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.dataset = dataset
+        self.initial_count = initial_count
+        self.batch_size = batch_size
+        self.load_delay_ms = load_delay_ms
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _page(self, username: str, max_id: Optional[int]) -> str:
+        tweets = self.dataset.timeline(username, max_id)
+        first = tweets[:self.initial_count]
+        cursor = self.initial_count if len(tweets) > self.initial_count else None
+        return PAGE_TEMPLATE.format(
+            articles="".join(render_article(tweet) for tweet in first),
+            cursor=json.dumps(cursor),
+            user=json.dumps(username),
+            max_id=json.dumps(max_id)
+        )
+
+    def _batch(self, username: str, cursor: int, max_id: Optional[int]) -> dict:
+        tweets: List[SyntheticTweet] = self.dataset.timeline(username, max_id)
+        batch = tweets[cursor:cursor + self.batch_size]
+        next_cursor = cursor + self.batch_size if cursor + self.batch_size < len(tweets) else None
+        return {"html": "".join(render_article(tweet) for tweet in batch), "cursor": next_cursor}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = parse_qs(parsed.query)
+
+                if parsed.path == "/search":
+                    query = params.get("q", [""])[0]
+                    user_match = re.search(r'from:(\w+)', query)
+                    max_id_match = re.search(r'max_id:(\d+)', query)
+                    if not user_match:
+                        self.send_error(400)
+                        return
+                    max_id = int(max_id_match.group(1)) if max_id_match else None
+                    self._send(stub._page(user_match.group(1), max_id).encode(), "text/html")
+
+                elif parsed.path == "/timeline":
+                    if stub.load_delay_ms:
+                        time.sleep(stub.load_delay_ms / 1000)
+                    max_id = params.get("max_id", [None])[0]
+                    body = stub._batch(
+                        params.get("user", [""])[0],
+                        int(params.get("cursor", ["0"])[0]),
+                        int(max_id) if max_id else None
+                    )
+                    self._send(json.dumps(body).encode(), "application/json")
+
+                else:
+                    self.send_error(404)
+
+            def _send(self, body: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="twitter-stub", daemon=True)
+        self._thread.start()
+        logger.info("Twitter stub listening on %s", self.base_url)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,86 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import json
+import random
+import re
+import threading
+import time
+import logging
+
+from src.benchmarks.dataset import SyntheticDataset
+
+logger = logging.getLogger(__name__)
+
+
+class VxTwitterStubServer:
+    """Local stand-in for api.vxtwitter.com with injectable latency and errors"""
+
+    def __init__(self, dataset: SyntheticDataset, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0, seed: int = 42, host: str = "127.0.0.1", port: int = 0):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def status_url(self) -> str:
+        """Prefix to pass as TweetProcessor.twitter_api"""
+        return f"{self.base_url}/Twitter/status/"
+
+    def _next_delay_and_failure(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return max(delay, 0) / 1000, failed
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                delay, failed = stub._next_delay_and_failure()
+                if delay:
+                    time.sleep(delay)
+                if failed:
+                    self.send_error(500)
+                    return
+
+                match = re.match(r'^/\w+/status/(\d+)', self.path)
+                tweet = stub.dataset.get(int(match.group(1))) if match else None
+                if tweet is None:
+                    self.send_error(404)
+                    return
+
+                body = json.dumps(tweet.to_vxtwitter()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="vxtwitter-stub", daemon=True)
+        self._thread.start()
+        logger.info("vxtwitter stub listening on %s", self.base_url)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,10 +1,17 @@
 from dotenv import load_dotenv
 import os
-from src.database.models.pydantic_models import DBConfig, TwitterCredentials 
+from src.database.models.pydantic_models import DBConfig, TwitterCredentials, BrowserRecycleConfig, MetricsConfig, LoggingConfig, DedupConfig, RetentionConfig, PipelineConfig, RenderConfig, DeliveryConfig, QueryCacheConfig
 
 
 load_dotenv()
 
+
+def _parse_mapping(value: str) -> dict:
+    """Parse "key=value,key=value" environment values"""
+    pairs = [item.split("=", 1) for item in value.split(",") if "=" in item]
+    return {key.strip(): val.strip() for key, val in pairs}
+
+
 TWITTER_CREDENTIALS = TwitterCredentials(
     username=os.getenv("TWITTER_USERNAME"),
     email=os.getenv("TWITTER_EMAIL"),
@@ -12,5 +19,77 @@ TWITTER_CREDENTIALS = TwitterCredentials(
 )
 
 DB_CONFIG = DBConfig(
-    db_url=os.getenv("DB_URL", "sqlite+aiosqlite:///./db.sqlite3")
+    db_url=os.getenv("DB_URL", "sqlite+aiosqlite:///./db.sqlite3"),
+    echo=os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes"),
+    pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    sqlite_busy_timeout_ms=int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    sqlite_wal=os.getenv("DB_SQLITE_WAL", "true").lower() in ("1", "true", "yes"),
+    lock_retries=int(os.getenv("DB_LOCK_RETRIES", 5))
+)
+
+BROWSER_RECYCLE_CONFIG = BrowserRecycleConfig(
+    max_accounts_per_context=int(os.getenv("BROWSER_MAX_ACCOUNTS_PER_CONTEXT", 5)),
+    max_scrolls_per_context=int(os.getenv("BROWSER_MAX_SCROLLS_PER_CONTEXT", 150)),
+    max_js_heap_mb=float(os.getenv("BROWSER_MAX_JS_HEAP_MB", 512)),
+    memory_check_every_scrolls=int(os.getenv("BROWSER_MEMORY_CHECK_EVERY_SCROLLS", 10))
+)
+
+METRICS_CONFIG = MetricsConfig(
+    enabled=os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes"),
+    http_port=int(os.getenv("METRICS_HTTP_PORT")) if os.getenv("METRICS_HTTP_PORT") else None,
+    dump_path=os.getenv("METRICS_DUMP_PATH")
+)
+
+LOGGING_CONFIG = LoggingConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    json_format=os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes"),
+    log_file=os.getenv("LOG_FILE"),
+    module_levels=_parse_mapping(os.getenv("LOG_LEVELS", "")),
+    rate_limited_modules=[module for module in os.getenv(
+        "LOG_RATE_LIMITED_MODULES", "src.services.crawler,src.database.repositories"
+    ).split(",") if module],
+    rate_limit_burst=int(os.getenv("LOG_RATE_LIMIT_BURST", 10)),
+    rate_limit_interval=float(os.getenv("LOG_RATE_LIMIT_INTERVAL", 10))
+)
+
+DEDUP_CONFIG = DedupConfig(
+    enabled=os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes"),
+    max_distance=int(os.getenv("DEDUP_MAX_DISTANCE", 3)),
+    min_tokens=int(os.getenv("DEDUP_MIN_TOKENS", 4))
+)
+
+RETENTION_CONFIG = RetentionConfig(
+    hot_days=int(os.getenv("RETENTION_HOT_DAYS", 30)),
+    batch_size=int(os.getenv("RETENTION_BATCH_SIZE", 1000)),
+    vacuum=os.getenv("RETENTION_VACUUM", "true").lower() in ("1", "true", "yes")
+)
+
+PIPELINE_CONFIG = PipelineConfig(
+    fetch_concurrency=int(os.getenv("FETCH_CONCURRENCY", 8)),
+    account_concurrency=int(os.getenv("ACCOUNT_CONCURRENCY", 4))
+)
+
+RENDER_CONFIG = RenderConfig(
+    enabled=os.getenv("RENDER_ENABLED", "true").lower() in ("1", "true", "yes"),
+    formats=[fmt for fmt in os.getenv("RENDER_FORMATS", "html").split(",") if fmt],
+    cache_size=int(os.getenv("RENDER_CACHE_SIZE", 10000))
+)
+
+DELIVERY_CONFIG = DeliveryConfig(
+    bot_token=os.getenv("TELEGRAM_BOT_TOKEN"),
+    format=os.getenv("DELIVERY_FORMAT", "html"),
+    batch_size=int(os.getenv("DELIVERY_BATCH_SIZE", 100)),
+    lease_seconds=int(os.getenv("DELIVERY_LEASE_SECONDS", 60)),
+    max_attempts=int(os.getenv("DELIVERY_MAX_ATTEMPTS", 5)),
+    retry_delay_seconds=int(os.getenv("DELIVERY_RETRY_DELAY_SECONDS", 30)),
+    send_concurrency=int(os.getenv("DELIVERY_SEND_CONCURRENCY", 10)),
+    idle_seconds=float(os.getenv("DELIVERY_IDLE_SECONDS", 5))
+)
+
+QUERY_CACHE_CONFIG = QueryCacheConfig(
+    enabled=os.getenv("QUERY_CACHE_ENABLED", "false").lower() in ("1", "true", "yes"),
+    max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 1024)),
+    ttl_seconds=float(os.getenv("QUERY_CACHE_TTL_SECONDS", 300))
 )
@@ -4,4 +4,8 @@ class TwitterAuthError(Exception):
 
 class TwitterScraperError(Exception):
     """Custom exception for scraper errors"""
-    pass
\ No newline at end of file
+    pass
+
+class InvalidCursorError(ValueError):
+    """Custom exception for pagination cursors that cannot be decoded"""
+    pass
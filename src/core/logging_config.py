@@ -0,0 +1,169 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from src.database.models.pydantic_models import LoggingConfig
+
+# Attributes every LogRecord has, anything else was passed through `extra`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed"}
+_LAZY_ARG_TYPES = (str, int, float, bool, type(None))
+
+_listener: Optional[QueueListener] = None
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                payload[key] = value
+        if getattr(record, "suppressed", 0):
+            payload["suppressed"] = record.suppressed
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, "suppressed", 0):
+            line += f" ({record.suppressed} similar messages suppressed)"
+        return line
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the writer thread
+
+    The stock handler renders the message and traceback in the calling thread. Records whose
+    arguments are plain values are queued as is, anything else (ORM entities, models) is rendered
+    up front since those objects may change or need the event loop by the time the writer runs.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args and not all(isinstance(arg, _LAZY_ARG_TYPES) for arg in _iter_args(record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _iter_args(args):
+    return args.values() if isinstance(args, dict) else args
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most `burst` records per message template every `interval` seconds
+
+    Only applies to loggers under the given prefixes. The count of dropped records is attached to
+    the next record that gets through as `suppressed`. Expired windows are swept once per interval,
+    a message that stops repeating loses the count of its last window.
+    """
+
+    def __init__(self, prefixes: Tuple[str, ...], burst: int, interval: float):
+        super().__init__()
+        self.prefixes = prefixes
+        self.burst = burst
+        self.interval = interval
+        self._windows: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + interval
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL or not record.name.startswith(self.prefixes):
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def _sweep(self, now: float):
+        """Drop the windows that ran out, every distinct message would otherwise keep one forever"""
+        expired = [key for key, window in self._windows.items() if now - window[0] >= self.interval]
+        for key in expired:
+            del self._windows[key]
+        self._next_sweep = now + self.interval
+
+
+def _parse_level(level: str) -> int:
+    return logging.getLevelName(level.upper()) if isinstance(level, str) else level
+
+
+def setup_logging(config: LoggingConfig) -> QueueListener:
+    """Route all logging through a queue to a background writer thread"""
+    global _listener, _atexit_registered
+    if _listener is not None:
+        stop_logging()
+
+    if config.log_file:
+        output = logging.FileHandler(config.log_file)
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    if config.json_format:
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    handler = LazyQueueHandler(log_queue)
+    if config.rate_limited_modules:
+        handler.addFilter(RateLimitFilter(
+            tuple(config.rate_limited_modules),
+            config.rate_limit_burst,
+            config.rate_limit_interval
+        ))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(_parse_level(config.level))
+
+    for module, level in config.module_levels.items():
+        logging.getLogger(module).setLevel(_parse_level(level))
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        # stop_logging stops whichever listener is current, one hook covers every later setup_logging call
+        atexit.register(stop_logging)
+        _atexit_registered = True
+    return _listener
+
+
+def stop_logging():
+    """Flush the queue and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,33 +1,99 @@
 import logging
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
 
-from src.core.config import DB_CONFIG 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.orm import sessionmaker
+    from src.database.models.pydantic_models import DBConfig
 
 logger = logging.getLogger(__name__)
 
-DB_URL = DB_CONFIG.db_url
-# Use aiosqlite for async support
-engine = create_async_engine(DB_URL, echo=True)
+# Created on first use so importing this module stays cheap for commands that never touch the DB
+_engine: Optional["AsyncEngine"] = None
+_session_factory: Optional["sessionmaker"] = None
+
+
+def build_engine(config: "DBConfig") -> "AsyncEngine":
+    """Create an engine whose pool can serve one session per concurrent task"""
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    options = {}
+    is_sqlite = config.db_url.startswith("sqlite")
+    if not (is_sqlite and ":memory:" in config.db_url):
+        options.update(pool_size=config.pool_size, max_overflow=config.max_overflow, pool_timeout=config.pool_timeout)
+    if is_sqlite:
+        # sqlite3 waits this long for a competing writer before raising "database is locked"
+        options["connect_args"] = {"timeout": config.sqlite_busy_timeout_ms / 1000}
+
+    # Use aiosqlite for async support
+    engine = create_async_engine(config.db_url, echo=config.echo, **options)
+
+    if is_sqlite:
+        @event.listens_for(engine.sync_engine, "connect")
+        def _configure_sqlite(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            # WAL lets readers run next to the single writer instead of blocking on it
+            if config.sqlite_wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout_ms)}")
+            cursor.close()
+
+    return engine
+
+
+def get_engine() -> "AsyncEngine":
+    global _engine
+    if _engine is None:
+        from src.core.config import DB_CONFIG
+
+        _engine = build_engine(DB_CONFIG)
+    return _engine
+
+
+def get_session_factory() -> "sessionmaker":
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import sessionmaker
+
+        # Configure AsyncSession
+        _session_factory = sessionmaker(
+            bind=get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False
+        )
+    return _session_factory
+
+
+def __getattr__(name: str):
+    # Keep the old module level names working without creating the engine at import time
+    if name == "engine":
+        return get_engine()
+    if name == "AsyncSessionLocal":
+        return get_session_factory()
+    if name == "DB_URL":
+        from src.core.config import DB_CONFIG
+        return DB_CONFIG.db_url
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Configure AsyncSession
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
 
 async def init_db():
+    """
+    Create every missing table and the full-text index, see src.database.search. Tables that already
+    exist are left alone, so it is safe to run on every start and brings an older database up to date.
+    """
     from src.database.models.models import Base
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 @asynccontextmanager
 async def get_session():
-    async with AsyncSessionLocal() as session:
+    async with get_session_factory()() as session:
         try:
             yield session
             await session.commit()
@@ -37,4 +103,4 @@ async def get_session():
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(init_db())
\ No newline at end of file
+    asyncio.run(init_db())
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Boolean, UUID, ForeignKey, Text, DateTime, Table
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Boolean, UUID, ForeignKey, Text, DateTime, Table, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.sqlite import JSON
 from uuid import uuid4
@@ -100,4 +100,112 @@ class DeliveredTweet(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(UUID, ForeignKey('users.id'))
     tweet_id = Column(Integer, ForeignKey('tweets.id'))
-    delivered_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    delivered_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TweetFingerprint(Base):
+    """Kept when its tweet is archived, so reposts of archived tweets are still caught"""
+    __tablename__ = 'tweet_fingerprints'
+    tweet_id = Column(Integer, primary_key=True)  # In `tweets` or `tweets_archive`, the id is the same in both
+    simhash = Column(BigInteger)  # None when the text is too short to compare
+    media_hash = Column(BigInteger)
+    duplicate_of_id = Column(Integer, index=True)  # Earliest tweet of the group, may already be archived
+
+
+class TweetSimilarityBucket(Base):
+    """LSH buckets, a tweet is only compared with the tweets sharing one of its buckets, archived ones included"""
+    __tablename__ = 'tweet_similarity_buckets'
+    bucket = Column(BigInteger, primary_key=True)
+    tweet_id = Column(Integer, primary_key=True)
+
+
+class ExportMarker(Base):
+    """Highest tweet id written by the last run of a named incremental export"""
+    __tablename__ = 'export_markers'
+    name = Column(String, primary_key=True)
+    last_tweet_id = Column(Integer, nullable=False)
+    exported_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchivedTweet(Base):
+    """Tweets past the retention window, text and media are kept as a zlib compressed JSON payload"""
+    __tablename__ = 'tweets_archive'
+    id = Column(Integer, primary_key=True)  # Same id the tweet had in `tweets`
+    twitter_id = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
+    account_id = Column(Integer)
+    category_id = Column(Integer)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchivedDeliveredTweet(Base):
+    __tablename__ = 'delivered_tweets_archive'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(UUID)
+    tweet_id = Column(Integer, index=True)
+    delivered_at = Column(DateTime)
+
+
+class RenderedMessage(Base):
+    """Telegram payload of a tweet, rendered once per output format version and reused for every recipient"""
+    __tablename__ = 'rendered_messages'
+    tweet_id = Column(Integer, ForeignKey('tweets.id'), primary_key=True)
+    format = Column(String, primary_key=True)
+    version = Column(Integer, primary_key=True)
+    payload = Column(JSON, nullable=False)
+    rendered_at = Column(DateTime, default=datetime.utcnow)
+
+
+class OutboxJob(Base):
+    """A pending delivery of one tweet to one user, claimed by a worker under a lease until it is acknowledged"""
+    __tablename__ = 'delivery_outbox'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'tweet_id', name='uq_delivery_outbox_user_tweet'),
+        Index('ix_delivery_outbox_claimable', 'available_at', 'lease_expires_at'),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(UUID, ForeignKey('users.id'), nullable=False)
+    tweet_id = Column(Integer, ForeignKey('tweets.id'), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Pushed back after a failed send
+    lease_token = Column(String)
+    lease_expires_at = Column(DateTime)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    failed_at = Column(DateTime)  # Set once the attempts are used up, the job is then a dead letter
+
+
+class CrawlRun(Base):
+    """Totals of one crawl, written once when the run finishes"""
+    __tablename__ = 'crawl_runs'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    accounts = Column(Integer, default=0, nullable=False)
+    tweets_found = Column(Integer, default=0, nullable=False)
+    tweets_inserted = Column(Integer, default=0, nullable=False)
+    errors = Column(Integer, default=0, nullable=False)
+
+
+class AccountCrawlStat(Base):
+    """What one crawl run did for one account"""
+    __tablename__ = 'account_crawl_stats'
+    __table_args__ = (
+        Index('ix_account_crawl_stats_username_run', 'username', 'run_id'),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Integer, ForeignKey('crawl_runs.id'), nullable=False, index=True)
+    account_id = Column(Integer, ForeignKey('twitter_accounts.id'))  # None when the account is not in the database
+    username = Column(String, nullable=False)
+    scrolls = Column(Integer, default=0, nullable=False)
+    tweets_found = Column(Integer, default=0, nullable=False)
+    tweets_fetched = Column(Integer, default=0, nullable=False)
+    tweets_inserted = Column(Integer, default=0, nullable=False)
+    errors = Column(Integer, default=0, nullable=False)
+    duration_seconds = Column(Float, default=0, nullable=False)
+
+
+# Registers the full-text index DDL to run after create_all
+import src.database.search  # noqa: E402,F401
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Optional
 import datetime
 
@@ -65,4 +65,213 @@ class TweetDetails(BaseModel):
 
 
 class DBConfig(BaseModel):
-    db_url: str
\ No newline at end of file
+    db_url: str
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_wal: bool = True
+    lock_retries: int = 5
+
+
+class BrowserRecycleConfig(BaseModel):
+    """Pydantic model to store browser recycling thresholds"""
+    max_accounts_per_context: int = 5
+    max_scrolls_per_context: int = 150
+    max_js_heap_mb: float = 512.0
+    memory_check_every_scrolls: int = 10
+
+
+class PageMemoryMetrics(BaseModel):
+    """Pydantic model to store memory metrics of a browser page"""
+    js_heap_used_mb: float
+    js_heap_total_mb: float
+    dom_nodes: int
+    documents: int
+    js_event_listeners: int
+
+
+class MetricsConfig(BaseModel):
+    """Pydantic model to store metrics collection settings"""
+    enabled: bool = False
+    http_port: Optional[int] = None
+    dump_path: Optional[str] = None
+
+class BenchmarkConfig(BaseModel):
+    """Pydantic model to store offline benchmark settings"""
+    accounts: int = 5
+    tweets_per_account: int = 200
+    days: int = 10
+    initial_count: int = 20
+    batch_size: int = 20
+    load_delay_ms: int = 0
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    error_rate: float = 0.0
+    fetch_concurrency: int = 8
+    account_concurrency: int = 4
+    skip_browser: bool = False
+    headless: bool = True
+
+
+class BenchmarkResult(BaseModel):
+    """Pydantic model to store offline benchmark results"""
+    tweets_expected: int
+    tweets_stored: int
+    fetch_errors: int
+    elapsed_seconds: float
+    tweets_per_second: float
+    fetch_p50_ms: Optional[float] = None
+    fetch_p99_ms: Optional[float] = None
+    insert_p50_ms: Optional[float] = None
+    insert_p99_ms: Optional[float] = None
+    dedup_p50_ms: Optional[float] = None
+    dedup_p99_ms: Optional[float] = None
+    peak_rss_mb: float
+    peak_children_rss_mb: float
+
+
+class LoggingConfig(BaseModel):
+    """Pydantic model to store logging settings"""
+    level: str = "INFO"
+    json_format: bool = False
+    log_file: Optional[str] = None
+    module_levels: Dict[str, str] = {}
+    rate_limited_modules: List[str] = []
+    rate_limit_burst: int = 10
+    rate_limit_interval: float = 10.0
+
+
+class AccountTweetStats(BaseModel):
+    """Pydantic model to store per-account tweet counts and freshness"""
+    username: str
+    tweet_count: int
+    latest_tweet_at: Optional[datetime.datetime] = None
+    last_fetched: Optional[datetime.datetime] = None
+
+
+class UserDeliveryBacklog(BaseModel):
+    """Pydantic model to store the number of undelivered tweets of a user"""
+    telegram_id: int
+    pending: int
+    failed: int = 0
+
+
+class TableStats(BaseModel):
+    """Pydantic model to store the row count of a table"""
+    name: str
+    rows: int
+
+
+class TweetSearchResult(BaseModel):
+    """Pydantic model to store a full-text search hit"""
+    id: int
+    twitter_id: str
+    text: Optional[str] = None
+    created_at: datetime.datetime
+    username: Optional[str] = None
+    category: Optional[str] = None
+    rank: float
+
+
+class TweetSearchPage(BaseModel):
+    """Pydantic model to store a page of search hits and the cursor of the next page"""
+    results: List[TweetSearchResult]
+    next_cursor: Optional[str] = None
+
+
+class DedupConfig(BaseModel):
+    """Pydantic model to store near-duplicate detection settings, changing max_distance requires rebuilding the buckets"""
+    enabled: bool = True
+    max_distance: int = Field(3, ge=1, le=7)  # Bounds of src.utils.similarity.band_buckets
+    min_tokens: int = 4
+
+class ExportResult(BaseModel):
+    """Pydantic model to store the outcome of a tweet export"""
+    path: str
+    format: str
+    rows: int
+    last_tweet_id: Optional[int] = None
+    elapsed_seconds: float
+
+class RetentionConfig(BaseModel):
+    """Pydantic model to store how long tweets stay in the hot tables"""
+    hot_days: int = 30
+    batch_size: int = 1000
+    vacuum: bool = True
+
+
+class RetentionResult(BaseModel):
+    """Pydantic model to store the outcome of a retention run"""
+    cutoff: datetime.datetime
+    tweets_archived: int
+    deliveries_archived: int
+    batches: int
+    size_before: Optional[int] = None
+    size_after: Optional[int] = None
+    elapsed_seconds: float
+
+
+class PipelineConfig(BaseModel):
+    """Pydantic model to store how many fetches and accounts the processor works on at once"""
+    fetch_concurrency: int = 8
+    account_concurrency: int = 4
+
+
+class RenderConfig(BaseModel):
+    """Pydantic model to store which Telegram formats are rendered after insert and how many stay in memory"""
+    enabled: bool = True
+    formats: List[str] = ["html"]
+    cache_size: int = 10000
+
+
+class DeliveryConfig(BaseModel):
+    """Pydantic model to store delivery worker settings"""
+    bot_token: Optional[str] = None
+    format: str = "html"
+    batch_size: int = 100
+    lease_seconds: int = 60
+    max_attempts: int = 5
+    retry_delay_seconds: int = 30
+    send_concurrency: int = 10
+    idle_seconds: float = 5.0
+
+
+class DeliveryJob(BaseModel):
+    """Pydantic model to store a claimed outbox job"""
+    id: int
+    telegram_id: int
+    tweet_id: int
+    attempts: int
+
+
+class QueryCacheConfig(BaseModel):
+    """Pydantic model to store the size and default TTL of the repository query cache, which is opt-in"""
+    enabled: bool = False
+    max_entries: int = 1024
+    ttl_seconds: float = 300.0
+
+
+class AccountCrawlStats(BaseModel):
+    """Pydantic model to store what a crawl run did for one account, filled in by the scraper and the processor"""
+    username: str
+    scrolls: int = 0
+    tweets_found: int = 0
+    tweets_fetched: int = 0
+    tweets_inserted: int = 0
+    errors: int = 0
+    duration_seconds: float = 0.0
+    succeeded: bool = True
+
+
+class CrawlRunStats(BaseModel):
+    """Pydantic model to store the totals of a finished crawl run"""
+    id: int
+    started_at: datetime.datetime
+    finished_at: datetime.datetime
+    duration_seconds: float
+    accounts: int
+    tweets_found: int
+    tweets_inserted: int
+    errors: int
\ No newline at end of file
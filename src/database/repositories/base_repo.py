@@ -1,82 +1,157 @@
-from typing import TypeVar, Generic, List, Optional
+from typing import TypeVar, Generic, List, Optional, AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, inspect, tuple_
 from src.database.base import Base
+from src.database.repositories.cache import QueryCache
 import logging
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T', bound=Base)
 
+# Session.info key of the tables written in the current transaction, invalidated in the query cache on commit
+DIRTY_TABLES = "dirty_tables"
+
 class BaseRepository(Generic[T]):
-    def __init__(self, model: T, session: AsyncSession):
+    def __init__(self, model: T, session: AsyncSession, autocommit: bool = True, cache: Optional[QueryCache] = None):
         self.model = model
         self.session = session
+        # Inside a unit of work writes are only flushed, the unit decides when to commit or roll back
+        self.autocommit = autocommit
+        # Opt-in, methods decorated with @cached read through it, writes below invalidate it
+        self.cache = cache
+
+    def _invalidate(self):
+        """
+        Drop cached lookups on the model's table and the association tables its relationships write to.
+        Inside a unit of work the write is only flushed, so the tables are remembered on the session and
+        the unit invalidates them once it has really committed, see UnitOfWork.__aexit__.
+        """
+        if self.cache is None:
+            return
+        mapper = inspect(self.model)
+        tables = [self.model.__tablename__]
+        tables.extend(rel.secondary.name for rel in mapper.relationships if rel.secondary is not None)
+        if self.autocommit:
+            self.cache.invalidate(tables)
+        else:
+            self.session.info.setdefault(DIRTY_TABLES, set()).update(tables)
+
+    async def _commit(self):
+        if self.autocommit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
+
+    async def _rollback(self):
+        if self.autocommit:
+            await self.session.rollback()
 
     async def get(self, id: int) -> Optional[T]:
         try:
-            logger.info(f"Fetching {self.model.__name__} by ID: {id}")
+            logger.debug("Fetching %s by ID: %s", self.model.__name__, id)
             result = await self.session.execute(select(self.model).filter(self.model.id == id))
             entity = result.scalars().first()
             if entity:
-                logger.info(f"Found {self.model.__name__}: {entity}")
+                logger.debug("Found %s with ID: %s", self.model.__name__, id)
             else:
-                logger.warning(f"No {self.model.__name__} found with ID: {id}")
+                logger.warning("No %s found with ID: %s", self.model.__name__, id)
             return entity
         except Exception as e:
-            logger.error(f"Error in get: {e}")
+            logger.error("Error in get: %s", e)
             raise
 
     async def get_all(self) -> List[T]:
         try:
-            logger.debug(f"Fetching all {self.model.__name__} entities")
+            logger.debug("Fetching all %s entities", self.model.__name__)
             result = await self.session.execute(select(self.model))
             entities = result.scalars().all()
-            logger.debug(f"Fetched {len(entities)} {self.model.__name__} entities")
+            logger.debug("Fetched %s %s entities", len(entities), self.model.__name__)
             return entities
         except Exception as e:
-            logger.error(f"Error in get_all: {e}")
+            logger.error("Error in get_all: %s", e)
+            raise
+
+    async def iter_batches(self, batch_size: int = 1000) -> AsyncIterator[List[T]]:
+        """
+        Yield every entity in primary key order, batch_size at a time, using keyset pagination.
+        Each batch is expunged from the session once the next one is requested, so memory stays
+        flat however large the table is. Changes to yielded entities must be saved before that.
+        """
+        try:
+            mapper = inspect(self.model)
+            keys = mapper.primary_key
+            # Composite keys paginate on the row value, single keys on the plain column
+            key = keys[0] if len(keys) == 1 else tuple_(*keys)
+            last = None
+            while True:
+                query = select(self.model).order_by(*keys).limit(batch_size)
+                if last is not None:
+                    query = query.where(key > last)
+                entities = (await self.session.execute(query)).scalars().all()
+                if not entities:
+                    return
+                logger.debug("Fetched batch of %s %s entities", len(entities), self.model.__name__)
+                identity = mapper.primary_key_from_instance(entities[-1])
+                last = identity[0] if len(keys) == 1 else tuple_(*identity)
+                yield entities
+                for entity in entities:
+                    self.session.expunge(entity)
+                if len(entities) < batch_size:
+                    return
+        except Exception as e:
+            logger.error("Error in iter_batches: %s", e)
             raise
 
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[T]:
+        """Stream every entity in constant memory, see iter_batches"""
+        async for entities in self.iter_batches(batch_size):
+            for entity in entities:
+                yield entity
+
     async def create(self, obj: T) -> T:
         try:
-            logger.debug(f"Creating {self.model.__name__}: {obj}")
+            logger.debug("Creating %s", self.model.__name__)
             self.session.add(obj)
-            await self.session.commit()
-            logger.debug(f"Created {self.model.__name__}: {obj}")
+            await self._commit()
+            self._invalidate()
+            logger.debug("Created %s with ID: %s", self.model.__name__, obj.id)
             return obj
         except Exception as e:
-            logger.error(f"Error in create: {e}")
+            logger.error("Error in create: %s", e)
             raise
 
     async def create_all(self, objs: List[T]) -> List[T]:
         try:
-            logger.debug(f"Creating multiple {self.model.__name__} entities")
+            logger.debug("Creating multiple %s entities", self.model.__name__)
             self.session.add_all(objs)
-            await self.session.commit()
-            logger.debug(f"Created {len(objs)} {self.model.__name__} entities")
+            await self._commit()
+            self._invalidate()
+            logger.debug("Created %s %s entities", len(objs), self.model.__name__)
             return objs
         except Exception as e:
-            logger.error(f"Error in create_all: {e}")
+            logger.error("Error in create_all: %s", e)
             raise
 
     async def update(self, obj: T) -> T:
         try:
-            logger.debug(f"Updating {self.model.__name__}: {obj}")
+            logger.debug("Updating %s with ID: %s", self.model.__name__, obj.id)
             await self.session.merge(obj)
-            await self.session.commit()
-            logger.debug(f"Updated {self.model.__name__}: {obj}")
+            await self._commit()
+            self._invalidate()
+            logger.debug("Updated %s with ID: %s", self.model.__name__, obj.id)
             return obj
         except Exception as e:
-            logger.error(f"Error in update: {e}")
+            logger.error("Error in update: %s", e)
             raise
 
     async def delete(self, obj: T) -> None:
         try:
-            logger.debug(f"Deleting {self.model.__name__}: {obj}")
+            logger.debug("Deleting %s with ID: %s", self.model.__name__, obj.id)
             await self.session.execute(delete(self.model).where(self.model.id == obj.id))
-            await self.session.commit()
-            logger.debug(f"Deleted {self.model.__name__}: {obj}")
+            await self._commit()
+            self._invalidate()
+            logger.debug("Deleted %s with ID: %s", self.model.__name__, obj.id)
         except Exception as e:
-            logger.error(f"Error in delete: {e}")
+            logger.error("Error in delete: %s", e)
             raise
@@ -0,0 +1,117 @@
+import functools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple, TypeVar
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar('F', bound=Callable[..., Awaitable[Any]])
+
+# (repository method, arguments)
+CacheKey = Tuple[str, Hashable]
+
+
+class QueryCache:
+    """
+    Read-through cache for repository lookups of rarely changing metadata, shared by every repository
+    that is handed the same instance. Entries expire after their TTL, the least recently used one is
+    evicted once max_entries is reached and writes through a repository drop every entry read from its table.
+    Every invalidation also bumps the table's generation, a read that started before it may have seen the
+    old rows and is not stored, see `cached`.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[CacheKey]] = {}
+        self._generations: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0, "stale_reads": 0}
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return False, None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return True, value
+
+    def generation(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Snapshot of the tables' invalidation counters, pass it to `set` to store a read only if none moved"""
+        return tuple(self._generations.get(table, 0) for table in tables)
+
+    def set(self, key: CacheKey, value: Any, tables: Tuple[str, ...], ttl: Optional[float] = None, generation: Optional[Tuple[int, ...]] = None):
+        if generation is not None and generation != self.generation(tables):
+            # One of the tables was written while the value was being read, it may already be stale
+            self._stats["stale_reads"] += 1
+            return
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + (self.default_ttl if ttl is None else ttl), tables, value)
+        for table in tables:
+            self._keys_by_table.setdefault(table, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def _discard(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[1]:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate(self, tables: Iterable[str]):
+        """Drop every entry that was read from one of the tables"""
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            keys = self._keys_by_table.pop(table, set())
+            for key in keys:
+                self._discard(key)
+            if keys:
+                self._stats["invalidations"] += len(keys)
+                logger.debug("Invalidated %s cached lookups on %s", len(keys), table)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_table.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+
+
+def cached(ttl: Optional[float] = None, tables: Optional[Tuple[str, ...]] = None) -> Callable[[F], F]:
+    """
+    Serve a repository method from its QueryCache, if it was given one. The result is keyed by the method
+    and its arguments, which must be hashable, and invalidated by writes to `tables`, the repository's
+    own table by default. A result is not stored when one of those tables was invalidated while it was
+    being read. Cached lists are copied on the way out so callers cannot change the entry.
+    """
+    def decorator(method: F) -> F:
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache: Optional[QueryCache] = getattr(self, "cache", None)
+            if cache is None:
+                return await method(self, *args, **kwargs)
+            key = (method.__qualname__, (args, tuple(sorted(kwargs.items()))))
+            found, value = cache.get(key)
+            metrics.QUERY_CACHE_LOOKUPS.inc(outcome="hit" if found else "miss", method=method.__name__)
+            if not found:
+                read_from = tables or (self.model.__tablename__,)
+                generation = cache.generation(read_from)
+                value = await method(self, *args, **kwargs)
+                cache.set(key, value, read_from, ttl, generation)
+            return list(value) if isinstance(value, list) else value
+        return wrapper
+    return decorator
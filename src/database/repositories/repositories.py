@@ -1,40 +1,115 @@
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+import base64
+import binascii
+import json
+import zlib
 
-from sqlalchemy import update, select, Integer
-from typing import Dict, Tuple, List, Optional, Any, Sequence
+from sqlalchemy import insert, update, delete, select, Integer, func, or_, and_, exists, text, table, column, literal, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import TYPE_CHECKING, Dict, Tuple, List, Optional, Any, Sequence, Union, AsyncIterator
 import logging
-from uuid import UUID
+from uuid import UUID, uuid4
 
+from src.core.exceptions import InvalidCursorError
 from src.database.repositories.base_repo import BaseRepository
-from src.database.models.pydantic_models import CategoryDbObject
-from src.database.models.models import Category, User, TwitterAccount, twitter_account_categories, user_account_subscriptions, user_category_subscriptions, Tweet as TweetModel
+from src.database.repositories.cache import cached
+from src.database.search import build_fts_query
+from src.utils import similarity
+from src.database.models.pydantic_models import CategoryDbObject, AccountTweetStats, UserDeliveryBacklog, TableStats, TweetSearchResult, TweetSearchPage, DedupConfig, TweetDB, DeliveryJob, AccountCrawlStats, CrawlRunStats
+from src.database.models.models import Base, Category, User, TwitterAccount, DeliveredTweet, TweetFingerprint, TweetSimilarityBucket, ExportMarker, ArchivedTweet, ArchivedDeliveredTweet, RenderedMessage, OutboxJob, CrawlRun, AccountCrawlStat, twitter_account_categories, user_account_subscriptions, user_category_subscriptions, Tweet as TweetModel
+
+if TYPE_CHECKING:
+    from src.services.crawler.records import StoredTweet
 
 logger = logging.getLogger(__name__)
 
+
+def _pending_delivery_clauses():
+    """
+    The join condition between users and the tweets they subscribe to, by category or by account, and the
+    conditions that leave only tweets still owed to them: not delivered yet and not a near-duplicate of a
+    tweet the same user was already sent or has queued. A duplicate whose original the user never got, e.g.
+    because it was posted by an account they do not follow, is still owed to them.
+    """
+    subscribed = or_(
+        exists().where(
+            user_category_subscriptions.c.user_id == User.id,
+            user_category_subscriptions.c.category_id == TweetModel.category_id
+        ),
+        exists().where(
+            user_account_subscriptions.c.user_id == User.id,
+            user_account_subscriptions.c.account_id == TweetModel.account_id
+        )
+    )
+    delivered = exists().where(DeliveredTweet.user_id == User.id, DeliveredTweet.tweet_id == TweetModel.id)
+    original_sent = or_(*(
+        exists().where(
+            TweetFingerprint.tweet_id == TweetModel.id,
+            delivery.user_id == User.id,
+            delivery.tweet_id == TweetFingerprint.duplicate_of_id
+        )
+        # The original may still be queued, or already archived together with its deliveries
+        for delivery in (DeliveredTweet, OutboxJob, ArchivedDeliveredTweet)
+    ))
+    return subscribed, [~delivered, ~original_sent]
+
+
 class TweetRepository(BaseRepository[TweetModel]):
     async def get_by_id(self, _id: int):
         try:
-            logger.debug(f"Fetching tweet by ID: {_id}")
+            logger.debug("Fetching tweet by ID: %s", _id)
             result = await self.session.execute(select(TweetModel).filter(TweetModel.id == _id))
             tweet = result.scalars().first()
             if tweet:
-                logger.debug(f"Found tweet: {tweet}")
+                logger.debug("Found tweet with ID: %s", _id)
             else:
-                logger.warning(f"No tweet found with ID: {_id}")
+                logger.warning("No tweet found with ID: %s", _id)
             return tweet
         except Exception as e:
-            logger.error(f"Error in get_by_id: {e}")
+            logger.error("Error in get_by_id: %s", e)
+            raise
+
+    async def get_many_with_usernames(self, tweet_ids: Sequence[int]) -> List[Tuple[TweetModel, str]]:
+        """Tweets with the username of their account, the input a renderer needs"""
+        try:
+            if not tweet_ids:
+                return []
+            result = await self.session.execute(
+                select(TweetModel, TwitterAccount.username)
+                .join(TwitterAccount, TwitterAccount.id == TweetModel.account_id)
+                .where(TweetModel.id.in_(list(tweet_ids)))
+            )
+            return [(row[0], row[1]) for row in result.all()]
+        except Exception as e:
+            logger.error("Error in get_many_with_usernames: %s", e)
+            raise
+
+    async def insert_rows(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Bulk insert plain rows with one executemany, returns the new ids in the order of `rows`"""
+        try:
+            if not rows:
+                return []
+            logger.debug("Inserting %s tweet rows", len(rows))
+            # Ordered RETURNING makes SQLAlchemy fall back to a statement per row on SQLite, matching the
+            # returned ids back by the unique twitter_id keeps the batched multi-row VALUES inserts
+            result = await self.session.execute(insert(TweetModel).returning(TweetModel.twitter_id, TweetModel.id), rows)
+            ids = dict(result.all())
+            await self._commit()
+            return [ids[row["twitter_id"]] for row in rows]
+        except Exception as e:
+            logger.error("Error in insert_rows: %s", e)
+            await self._rollback()
             raise
 
     async def tweet_exists(self, tweet_id: str):
         try:
-            logger.debug(f"Checking if tweet exists with ID: {tweet_id}")
+            logger.debug("Checking if tweet exists with ID: %s", tweet_id)
             result = await self.session.execute(select(TweetModel.id).where(TweetModel.twitter_id == tweet_id))
             exists = result.scalars().first() is not None
-            logger.debug(f"Tweet exists: {exists}")
+            logger.debug("Tweet exists: %s", exists)
             return exists
         except Exception as e:
-            logger.error(f"Error in tweet_exists: {e}")
+            logger.error("Error in tweet_exists: %s", e)
             raise
 
     async def get_all_ids(self):
@@ -42,51 +117,416 @@ class TweetRepository(BaseRepository[TweetModel]):
             logger.debug("Fetching all tweet IDs")
             result = await self.session.execute(select(TweetModel.twitter_id))
             ids = result.scalars().all()
-            logger.debug(f"Fetched {len(ids)} tweet IDs")
+            logger.debug("Fetched %s tweet IDs", len(ids))
             return ids
         except Exception as e:
-            logger.error(f"Error in get_all_ids: {e}")
+            logger.error("Error in get_all_ids: %s", e)
+            raise
+
+    async def iter_ids(self, batch_size: int = 5000, since: Optional[datetime] = None, include_archived: bool = True) -> AsyncIterator[str]:
+        """
+        Stream twitter ids, paginated by primary key so no cursor stays open between batches.
+        Archived tweets are included so they are not scraped and stored again, `since` limits
+        both tables to tweets created at or after that date.
+        """
+        try:
+            sources = [TweetModel]
+            if include_archived:
+                sources.append(ArchivedTweet)
+            for model in sources:
+                last = 0
+                while True:
+                    stmt = select(model.id, model.twitter_id).where(model.id > last).order_by(model.id).limit(batch_size)
+                    if since:
+                        stmt = stmt.where(model.created_at >= since)
+                    rows = (await self.session.execute(stmt)).all()
+                    for _, twitter_id in rows:
+                        yield twitter_id
+                    if len(rows) < batch_size:
+                        break
+                    last = rows[-1][0]
+        except Exception as e:
+            logger.error("Error in iter_ids: %s", e)
+            raise
+
+    async def iter_export_rows(
+            self,
+            category: Optional[Union[int, str]] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            after_id: Optional[int] = None,
+            batch_size: int = 5000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream tweets joined with their account and category names as plain dicts, batch_size rows at a time.
+        Rows are selected as columns and paginated by id, so no ORM objects are built and memory stays flat.
+        """
+        try:
+            stmt = (
+                select(
+                    TweetModel.id, TweetModel.twitter_id, TweetModel.text, TweetModel.created_at,
+                    TweetModel.media_urls, TwitterAccount.username, Category.name.label("category")
+                )
+                .select_from(TweetModel)
+                .outerjoin(TwitterAccount, TwitterAccount.id == TweetModel.account_id)
+                .outerjoin(Category, Category.id == TweetModel.category_id)
+                .order_by(TweetModel.id)
+                .limit(batch_size)
+            )
+            if isinstance(category, int):
+                stmt = stmt.where(TweetModel.category_id == category)
+            elif category:
+                stmt = stmt.where(Category.name == category)
+            if since:
+                stmt = stmt.where(TweetModel.created_at >= since)
+            if until:
+                stmt = stmt.where(TweetModel.created_at < until)
+
+            last = after_id or 0
+            while True:
+                rows = (await self.session.execute(stmt.where(TweetModel.id > last))).mappings().all()
+                if not rows:
+                    return
+                logger.debug("Fetched export batch of %s tweets after ID %s", len(rows), last)
+                last = rows[-1]["id"]
+                yield [dict(row) for row in rows]
+                if len(rows) < batch_size:
+                    return
+        except Exception as e:
+            logger.error("Error in iter_export_rows: %s", e)
+            raise
+
+    def _search_clauses(self, query: str):
+        """Return the (from clause, match condition, rank expression) for the current dialect, lower rank is better"""
+        dialect = self.session.bind.dialect.name
+        if dialect == "sqlite":
+            fts = table("tweets_fts", column("rowid"))
+            return (
+                fts.join(TweetModel, TweetModel.id == fts.c.rowid),
+                literal_column("tweets_fts").op("MATCH")(build_fts_query(query)),
+                func.bm25(literal_column("tweets_fts"))
+            )
+        if dialect == "postgresql":
+            vector = func.to_tsvector('english', func.coalesce(TweetModel.text, ''))
+            ts_query = func.websearch_to_tsquery('english', query)
+            return TweetModel, vector.op("@@")(ts_query), -func.ts_rank_cd(vector, ts_query)
+        return TweetModel, TweetModel.text.ilike(f"%{query}%"), literal(0.0)
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[float, int, int]:
+        """Unpack a cursor printed by an earlier page, anything else raises InvalidCursorError"""
+        try:
+            last_rank, last_id, as_of = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(last_rank), int(last_id), int(as_of)
+        except (binascii.Error, ValueError, TypeError) as e:
+            raise InvalidCursorError(f"Invalid cursor {cursor!r}, pass the one printed by the previous page") from e
+
+    async def search(
+            self,
+            query: str,
+            category: Optional[Union[int, str]] = None,
+            account: Optional[str] = None,
+            since: Optional[datetime] = None,
+            limit: int = 20,
+            cursor: Optional[str] = None
+    ) -> TweetSearchPage:
+        """
+        Full-text search over tweet text, ranked by relevance and paginated with an opaque keyset cursor.
+        The cursor holds the (rank, tweet id) of the last row, the id breaking ties between equal ranks, and
+        the highest tweet id when the first page was read, so tweets inserted later never show up on later
+        pages. Each page continues after the last row's current rank, which keeps pages consistent when the
+        index changes uniformly. bm25 and ts_rank_cd depend on the whole index, so a change can still reorder
+        rows relative to each other; pages are only guaranteed not to skip or repeat rows while the index
+        does not change between them, e.g. between crawls or retention runs. A cursor that cannot be decoded
+        raises InvalidCursorError.
+        """
+        position = self._decode_cursor(cursor) if cursor else None
+        try:
+            logger.debug("Searching tweets for %r", query)
+            if not build_fts_query(query):
+                return TweetSearchPage(results=[])
+
+            source, match, rank = self._search_clauses(query)
+            stmt = (
+                select(
+                    TweetModel.id, TweetModel.twitter_id, TweetModel.text, TweetModel.created_at,
+                    TwitterAccount.username, Category.name, rank.label("rank")
+                )
+                .select_from(source)
+                .outerjoin(TwitterAccount, TwitterAccount.id == TweetModel.account_id)
+                .outerjoin(Category, Category.id == TweetModel.category_id)
+                .where(match)
+            )
+
+            if isinstance(category, int):
+                stmt = stmt.where(TweetModel.category_id == category)
+            elif category:
+                stmt = stmt.where(Category.name == category)
+            if account:
+                stmt = stmt.where(func.lower(TwitterAccount.username) == account.strip('@').lower())
+            if since:
+                stmt = stmt.where(TweetModel.created_at >= since)
+            if position:
+                last_rank, last_id, as_of = position
+                # Re-anchor on the last row's rank as it is now, a changed index shifts the scores of every row
+                # together, comparing against the stale score would then skip or repeat whole runs of rows
+                current = (await self.session.execute(
+                    select(rank).select_from(source).where(match, TweetModel.id == last_id)
+                )).scalar()
+                if current is not None:
+                    last_rank = current
+                stmt = stmt.where(or_(rank > last_rank, and_(rank == last_rank, TweetModel.id > last_id)))
+            else:
+                as_of = (await self.session.execute(select(func.max(TweetModel.id)))).scalar() or 0
+            stmt = stmt.where(TweetModel.id <= as_of)
+
+            stmt = stmt.order_by(rank, TweetModel.id).limit(limit + 1)
+            rows = (await self.session.execute(stmt)).all()
+
+            results = [
+                TweetSearchResult(
+                    id=row[0], twitter_id=row[1], text=row[2], created_at=row[3],
+                    username=row[4], category=row[5], rank=float(row[6])
+                )
+                for row in rows[:limit]
+            ]
+            next_cursor = None
+            if len(rows) > limit:
+                last = results[-1]
+                next_cursor = base64.urlsafe_b64encode(json.dumps([last.rank, last.id, as_of]).encode()).decode()
+            logger.debug("Found %s search results", len(results))
+            return TweetSearchPage(results=results, next_cursor=next_cursor)
+        except Exception as e:
+            logger.error("Error in search: %s", e)
+            raise
+
+
+class TweetFingerprintRepository(BaseRepository[TweetFingerprint]):
+    """Near-duplicate index, SimHash fingerprints looked up through LSH buckets instead of pairwise comparison"""
+
+    def __init__(self, model: TweetFingerprint, session: AsyncSession, config: Optional[DedupConfig] = None, autocommit: bool = True):
+        super().__init__(model, session, autocommit)
+        self.config = config or DedupConfig()
+
+    def _fingerprint(self, tweet: Union[TweetModel, "StoredTweet"]) -> Tuple[Optional[int], Optional[int], List[int]]:
+        tokens = similarity.normalize_tokens(tweet.text)
+        text_hash = similarity.simhash(tokens) if len(tokens) >= self.config.min_tokens else None
+        media_hash = similarity.media_fingerprint(tweet.media_urls)
+        buckets = similarity.band_buckets(text_hash, self.config.max_distance) if text_hash is not None else []
+        if media_hash is not None and text_hash is None:
+            # Media only decides between tweets without comparable text, see _is_duplicate
+            buckets.append(similarity.media_bucket(media_hash))
+        return text_hash, media_hash, buckets
+
+    def _is_duplicate(self, text_hash: Optional[int], media_hash: Optional[int], other: Tuple[Optional[int], Optional[int]]) -> bool:
+        """
+        Texts within max_distance bits are duplicates. The same media only counts when neither tweet has enough
+        text to compare, a shared picture under two different texts is two different tweets.
+        """
+        other_text, other_media = other
+        if text_hash is not None and other_text is not None:
+            return similarity.hamming_distance(text_hash, other_text) <= self.config.max_distance
+        return text_hash is None and other_text is None and media_hash is not None and media_hash == other_media
+
+    async def _load_candidates(self, buckets: List[int]) -> Dict[int, List[int]]:
+        """Map every bucket to the already indexed tweets in it, one query per chunk of buckets"""
+        members: Dict[int, List[int]] = {}
+        for start in range(0, len(buckets), 500):
+            result = await self.session.execute(
+                select(TweetSimilarityBucket.bucket, TweetSimilarityBucket.tweet_id)
+                .where(TweetSimilarityBucket.bucket.in_(buckets[start:start + 500]))
+            )
+            for bucket, tweet_id in result.all():
+                members.setdefault(bucket, []).append(tweet_id)
+        return members
+
+    async def _load_fingerprints(self, tweet_ids: Sequence[int]) -> Dict[int, Tuple[Optional[int], Optional[int], Optional[int]]]:
+        fingerprints = {}
+        ids = list(tweet_ids)
+        for start in range(0, len(ids), 500):
+            result = await self.session.execute(
+                select(TweetFingerprint.tweet_id, TweetFingerprint.simhash, TweetFingerprint.media_hash, TweetFingerprint.duplicate_of_id)
+                .where(TweetFingerprint.tweet_id.in_(ids[start:start + 500]))
+            )
+            for tweet_id, text_hash, media_hash, duplicate_of in result.all():
+                fingerprints[tweet_id] = (
+                    similarity.to_unsigned(text_hash) if text_hash is not None else None,
+                    similarity.to_unsigned(media_hash) if media_hash is not None else None,
+                    duplicate_of
+                )
+        return fingerprints
+
+    async def flag_near_duplicates(self, tweets: Sequence[Union[TweetModel, "StoredTweet"]]) -> int:
+        """
+        Fingerprint freshly inserted tweets and point each near-duplicate at the earliest tweet of its group.
+        Candidates for the whole batch are loaded with a single bucket lookup, so the cost per tweet
+        does not grow with the number of stored tweets. Returns the number of tweets flagged.
+        """
+        try:
+            tweets = [tweet for tweet in tweets if tweet.id is not None]
+            if not tweets:
+                return 0
+            computed = [(tweet, *self._fingerprint(tweet)) for tweet in tweets]
+            all_buckets = sorted({bucket for *_, buckets in computed for bucket in buckets})
+            members = await self._load_candidates(all_buckets)
+            known = await self._load_fingerprints({tweet_id for ids in members.values() for tweet_id in ids})
+
+            fingerprint_rows, bucket_rows = [], []
+            flagged = 0
+            for tweet, text_hash, media_hash, buckets in computed:
+                candidates = sorted({tweet_id for bucket in buckets for tweet_id in members.get(bucket, ()) if tweet_id != tweet.id})
+                duplicate_of = None
+                for candidate in candidates:
+                    if candidate not in known:
+                        continue
+                    other_text, other_media, other_duplicate_of = known[candidate]
+                    if self._is_duplicate(text_hash, media_hash, (other_text, other_media)):
+                        duplicate_of = other_duplicate_of or candidate
+                        break
+                if duplicate_of is not None:
+                    flagged += 1
+                    logger.debug("Tweet %s is a near-duplicate of %s", tweet.id, duplicate_of)
+
+                # Later tweets of the same batch can match this one
+                known[tweet.id] = (text_hash, media_hash, duplicate_of)
+                for bucket in buckets:
+                    members.setdefault(bucket, []).append(tweet.id)
+
+                fingerprint_rows.append({
+                    "tweet_id": tweet.id,
+                    "simhash": similarity.to_signed(text_hash) if text_hash is not None else None,
+                    "media_hash": similarity.to_signed(media_hash) if media_hash is not None else None,
+                    "duplicate_of_id": duplicate_of
+                })
+                bucket_rows.extend({"bucket": bucket, "tweet_id": tweet.id} for bucket in buckets)
+
+            await self.session.execute(insert(TweetFingerprint), fingerprint_rows)
+            if bucket_rows:
+                await self.session.execute(insert(TweetSimilarityBucket), bucket_rows)
+            await self._commit()
+            logger.debug("Fingerprinted %s tweets, %s near-duplicates", len(fingerprint_rows), flagged)
+            return flagged
+        except Exception as e:
+            logger.error("Error in flag_near_duplicates: %s", e)
+            raise
+
+    async def get_duplicate_ids(self, tweet_ids: Sequence[int]) -> Dict[int, int]:
+        """Map the given tweets that are near-duplicates to the tweet they duplicate, so delivery can collapse them"""
+        try:
+            result = await self.session.execute(
+                select(TweetFingerprint.tweet_id, TweetFingerprint.duplicate_of_id)
+                .where(TweetFingerprint.tweet_id.in_(list(tweet_ids)), TweetFingerprint.duplicate_of_id.is_not(None))
+            )
+            return dict(result.all())
+        except Exception as e:
+            logger.error("Error in get_duplicate_ids: %s", e)
+            raise
+
+
+class ExportMarkerRepository(BaseRepository[ExportMarker]):
+    async def get_last_tweet_id(self, name: str) -> Optional[int]:
+        try:
+            result = await self.session.execute(select(ExportMarker.last_tweet_id).where(ExportMarker.name == name))
+            return result.scalars().first()
+        except Exception as e:
+            logger.error("Error in get_last_tweet_id: %s", e)
+            raise
+
+    async def set_last_tweet_id(self, name: str, tweet_id: int):
+        try:
+            logger.debug("Moving export marker %s to tweet ID %s", name, tweet_id)
+            await self.session.merge(ExportMarker(name=name, last_tweet_id=tweet_id, exported_at=datetime.utcnow()))
+            await self._commit()
+        except Exception as e:
+            logger.error("Error in set_last_tweet_id: %s", e)
+            raise
+
+
+class RenderedMessageRepository(BaseRepository[RenderedMessage]):
+    async def get_many(self, tweet_ids: Sequence[int], format: str, version: int) -> Dict[int, Dict[str, Any]]:
+        try:
+            payloads = {}
+            ids = list(tweet_ids)
+            for start in range(0, len(ids), 500):
+                result = await self.session.execute(
+                    select(RenderedMessage.tweet_id, RenderedMessage.payload).where(
+                        RenderedMessage.tweet_id.in_(ids[start:start + 500]),
+                        RenderedMessage.format == format,
+                        RenderedMessage.version == version
+                    )
+                )
+                payloads.update(result.all())
+            return payloads
+        except Exception as e:
+            logger.error("Error in get_many: %s", e)
+            raise
+
+    async def save_many(self, rows: List[Dict[str, Any]]):
+        """Store rendered payloads, replacing what an earlier render of the same tweet, format and version left"""
+        try:
+            rendered_at = datetime.utcnow()
+            for format, version in {(row["format"], row["version"]) for row in rows}:
+                await self.session.execute(delete(RenderedMessage).where(
+                    RenderedMessage.tweet_id.in_([row["tweet_id"] for row in rows if row["format"] == format]),
+                    RenderedMessage.format == format,
+                    RenderedMessage.version == version
+                ))
+            await self.session.execute(insert(RenderedMessage), [dict(row, rendered_at=rendered_at) for row in rows])
+            await self._commit()
+            logger.debug("Stored %s rendered messages", len(rows))
+        except Exception as e:
+            logger.error("Error in save_many: %s", e)
+            await self._rollback()
             raise
 
 
 class TwitterAccountRepository(BaseRepository[TwitterAccount]):
+    @cached()
     async def get_account_details(self):
         try:
             logger.debug("Fetching all Twitter account details")
             result = await self.session.execute(select(TwitterAccount.id, TwitterAccount.username))
             accounts = result.fetchall()
-            logger.debug(f"Fetched {len(accounts)} account details")
+            logger.debug("Fetched %s account details", len(accounts))
             return [account for account in accounts]
         except Exception as e:
-            logger.error(f"Error in get_account_details: {e}")
+            logger.error("Error in get_account_details: %s", e)
             raise
 
+    @cached()
     async def get_id_by_username(self, username: str):
         try:
-            logger.debug(f"Fetching account ID for username: {username}")
+            logger.debug("Fetching account ID for username: %s", username)
             result = await self.session.execute(select(TwitterAccount.id).where(TwitterAccount.username == username))
             account_id = result.scalars().first()
             if account_id:
-                logger.debug(f"Found account ID: {account_id}")
+                logger.debug("Found account ID: %s", account_id)
             else:
-                logger.warning(f"No account found for username: {username}")
+                logger.warning("No account found for username: %s", username)
             return account_id
         except Exception as e:
-            logger.error(f"Error in get_id_by_username: {e}")
+            logger.error("Error in get_id_by_username: %s", e)
             raise
 
+    @cached(tables=("twitter_account_categories",))
     async def get_category_id_by_account_id(self, account_id: int):
         try:
-            logger.info(f"Fetching category ID for account ID: {account_id}")
-            result = await self.session.execute(select(TwitterAccount.category_id).where(TwitterAccount.id == account_id))
+            logger.debug("Fetching category ID for account ID: %s", account_id)
+            # Accounts are linked to categories through the association table, the first link wins
+            result = await self.session.execute(
+                select(twitter_account_categories.c.category_id)
+                .where(twitter_account_categories.c.twitter_account_id == account_id)
+                .order_by(twitter_account_categories.c.category_id)
+                .limit(1)
+            )
             category_id = result.scalars().first()
             if category_id:
-                logger.info(f"Found category ID: {category_id}")
+                logger.debug("Found category ID: %s", category_id)
             else:
-                logger.warning(f"No category found for account ID: {account_id}")
+                logger.warning("No category found for account ID: %s", account_id)
             return category_id
         except Exception as e:
-            logger.error(f"Error in get_category_id_by_account_id: {e}")
+            logger.error("Error in get_category_id_by_account_id: %s", e)
             raise
 
     async def get_twitter_accounts(self):
@@ -94,10 +534,10 @@ class TwitterAccountRepository(BaseRepository[TwitterAccount]):
             logger.debug("Fetching all Twitter accounts")
             result = await self.session.execute(select(TwitterAccount.username))
             accounts = result.scalars().all()
-            logger.debug(f"Fetched {len(accounts)} accounts")
+            logger.debug("Fetched %s accounts", len(accounts))
             return accounts
         except Exception as e:
-            logger.error(f"Error in get_twitter_accounts: {e}")
+            logger.error("Error in get_twitter_accounts: %s", e)
             raise
 
     async def update_last_fetched(self, screen_user_name: str):
@@ -110,13 +550,59 @@ class TwitterAccountRepository(BaseRepository[TwitterAccount]):
                 .values(last_fetched=datetime.now(timezone.utc))
             )
             await self.session.execute(stmt)
-            await self.session.commit()
+            await self._commit()
+            self._invalidate()
         except Exception as e:
-            logger.error(f"Error in update_last_fetched: {e}")
-            await self.session.rollback()
+            logger.error("Error in update_last_fetched: %s", e)
+            await self._rollback()
+            raise
+
+    async def update_last_fetched_many(self, usernames: Sequence[str], fetched_at: Optional[datetime] = None) -> int:
+        """Mark every crawled account fresh with a single UPDATE, including accounts that had nothing new"""
+        try:
+            if not usernames:
+                return 0
+            logger.debug("Updating last fetched for %s accounts", len(usernames))
+            # The scraper lowercases usernames, the table keeps them as they were added
+            result = await self.session.execute(
+                update(TwitterAccount)
+                .where(func.lower(TwitterAccount.username).in_([username.lower() for username in usernames]))
+                .values(last_fetched=fetched_at or datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            await self._commit()
+            self._invalidate()
+            return result.rowcount
+        except Exception as e:
+            logger.error("Error in update_last_fetched_many: %s", e)
+            await self._rollback()
+            raise
+
+    async def get_account_stats(self) -> List[AccountTweetStats]:
+        try:
+            logger.debug("Fetching per-account tweet stats")
+            query = (
+                select(
+                    TwitterAccount.username,
+                    func.count(TweetModel.id),
+                    func.max(TweetModel.created_at),
+                    TwitterAccount.last_fetched
+                )
+                .outerjoin(TweetModel, TweetModel.account_id == TwitterAccount.id)
+                .group_by(TwitterAccount.id)
+                .order_by(TwitterAccount.username)
+            )
+            result = await self.session.execute(query)
+            return [
+                AccountTweetStats(username=row[0], tweet_count=row[1], latest_tweet_at=row[2], last_fetched=row[3])
+                for row in result.all()
+            ]
+        except Exception as e:
+            logger.error("Error in get_account_stats: %s", e)
             raise
 
 class CategoryRepository(BaseRepository[Category]):
+    @cached(tables=("twitter_account_categories", "twitter_accounts", "categories"))
     async def get_account_category_mappings(self) -> List[Tuple[int, int]]:
         try:
             # Correct select syntax for SQLAlchemy
@@ -129,9 +615,10 @@ class CategoryRepository(BaseRepository[Category]):
             # Ensure we're working with integers
             return [(int(row[0]), int(row[1])) for row in rows]
         except Exception as e:
-            logger.error(f"Error in get_account_category_mappings: {e}")
+            logger.error("Error in get_account_category_mappings: %s", e)
             raise
 
+    @cached()
     async def get_all_category_info(self) -> List[CategoryDbObject]:
         try:
             query = select(
@@ -145,35 +632,451 @@ class CategoryRepository(BaseRepository[Category]):
             return [CategoryDbObject(id=int(_row[0]), description=_row[1], name=_row[2], is_active=_row[3]) for _row in rows]
 
         except Exception as e:
-            logger.error(f"Error in get_all_categories: {e}")
+            logger.error("Error in get_all_categories: %s", e)
             raise
 
 
 class UserRepository(BaseRepository[User]):
+    @cached(ttl=60, tables=("user_category_subscriptions",))
     async def get_all_subscribed_categories(self, user_id: UUID) -> List[int]:
         try:
-            logger.debug(f"Fetching all subscribed categories for user ID: {user_id}")
+            logger.debug("Fetching all subscribed categories for user ID: %s", user_id)
             result = await self.session.execute(
                 select(user_category_subscriptions.c.category_id)
                 .where(user_category_subscriptions.c.user_id == user_id)
             )
             categories = result.scalars().all()
-            logger.debug(f"Fetched {len(categories)} subscribed categories")
+            logger.debug("Fetched %s subscribed categories", len(categories))
             return categories
         except Exception as e:
-            logger.error(f"Error in get_all_subscribed_categories: {e}")
+            logger.error("Error in get_all_subscribed_categories: %s", e)
             raise
 
+    @cached(ttl=60, tables=("user_account_subscriptions",))
     async def get_all_subscribed_accounts(self, user_id: UUID) -> List[int]:
         try:
-            logger.debug(f"Fetching all subscribed accounts for user ID: {user_id}")
+            logger.debug("Fetching all subscribed accounts for user ID: %s", user_id)
             result = await self.session.execute(
                 select(user_account_subscriptions.c.account_id)
                 .where(user_account_subscriptions.c.user_id == user_id)
             )
             accounts = result.scalars().all()
-            logger.debug(f"Fetched {len(accounts)} subscribed accounts")
+            logger.debug("Fetched %s subscribed accounts", len(accounts))
             return accounts
         except Exception as e:
-            logger.error(f"Error in get_all_subscribed_accounts: {e}")
-            raise
\ No newline at end of file
+            logger.error("Error in get_all_subscribed_accounts: %s", e)
+            raise
+
+
+class OutboxRepository(BaseRepository[OutboxJob]):
+    """
+    Durable delivery queue. Jobs are claimed in batches under a lease, a worker that dies simply lets the lease
+    run out and another worker picks the jobs up again, so every job is delivered at least once.
+    """
+
+    def _insert_ignoring_duplicates(self):
+        dialect = self.session.bind.dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            return insert(OutboxJob)
+        return dialect_insert(OutboxJob)
+
+    async def _enqueue(self, *conditions) -> int:
+        subscribed, pending = _pending_delivery_clauses()
+        queued = exists().where(OutboxJob.user_id == User.id, OutboxJob.tweet_id == TweetModel.id)
+        is_duplicate = exists().where(TweetFingerprint.tweet_id == TweetModel.id, TweetFingerprint.duplicate_of_id.is_not(None))
+        now = datetime.utcnow()
+        total = 0
+        # Originals first, so a duplicate queued in the same call already sees its original in the outbox
+        for kind in (~is_duplicate, is_duplicate):
+            jobs = (
+                select(User.id, TweetModel.id, literal(now), literal(now), literal(0))
+                .select_from(User)
+                .join(TweetModel, subscribed)
+                .where(User.is_active.is_(True), ~queued, *pending, kind, *conditions)
+            )
+            stmt = self._insert_ignoring_duplicates().from_select(
+                ["user_id", "tweet_id", "created_at", "available_at", "attempts"], jobs
+            )
+            if hasattr(stmt, "on_conflict_do_nothing"):
+                # A concurrent enqueue of the same pair is not an error
+                stmt = stmt.on_conflict_do_nothing()
+            total += (await self.session.execute(stmt)).rowcount
+        await self._commit()
+        return total
+
+    async def enqueue_for_tweets(self, tweet_ids: Sequence[int]) -> int:
+        """Queue a job for every active subscriber still owed one of the tweets, already queued pairs are skipped"""
+        try:
+            if not tweet_ids:
+                return 0
+            queued = await self._enqueue(TweetModel.id.in_(list(tweet_ids)))
+            logger.debug("Queued %s deliveries for %s tweets", queued, len(tweet_ids))
+            return queued
+        except Exception as e:
+            logger.error("Error in enqueue_for_tweets: %s", e)
+            await self._rollback()
+            raise
+
+    async def enqueue_backlog(self, since: Optional[datetime] = None) -> int:
+        """Queue every subscribed tweet still owed to a user, optionally only those created after `since`"""
+        try:
+            queued = await self._enqueue(*([TweetModel.created_at >= since] if since else []))
+            logger.info("Queued %s deliveries from the backlog", queued)
+            return queued
+        except Exception as e:
+            logger.error("Error in enqueue_backlog: %s", e)
+            await self._rollback()
+            raise
+
+    async def claim_batch(self, limit: int = 100, lease_seconds: int = 60, max_attempts: int = 5) -> Tuple[str, List[DeliveryJob]]:
+        """Lease up to `limit` available jobs, returns the lease token to acknowledge or release them with"""
+        try:
+            now = datetime.utcnow()
+            token = uuid4().hex
+            # A worker that died during the final attempt never released its jobs, they are dead letters now
+            await self.session.execute(
+                update(OutboxJob)
+                .where(
+                    OutboxJob.failed_at.is_(None),
+                    OutboxJob.attempts >= max_attempts,
+                    OutboxJob.lease_expires_at < now
+                )
+                .values(failed_at=now, lease_token=None, lease_expires_at=None, last_error=func.coalesce(OutboxJob.last_error, "Lease expired on the final attempt"))
+                .execution_options(synchronize_session=False)
+            )
+            claimable = (
+                select(OutboxJob.id)
+                .where(
+                    OutboxJob.failed_at.is_(None),
+                    OutboxJob.available_at <= now,
+                    or_(OutboxJob.lease_expires_at.is_(None), OutboxJob.lease_expires_at < now),
+                    OutboxJob.attempts < max_attempts
+                )
+                .order_by(OutboxJob.id)
+                .limit(limit)
+            )
+            if self.session.bind.dialect.name == "postgresql":
+                # Concurrent workers skip each other's rows instead of queueing behind them
+                claimable = claimable.with_for_update(skip_locked=True)
+            await self.session.execute(
+                update(OutboxJob)
+                .where(OutboxJob.id.in_(claimable.scalar_subquery()))
+                .values(lease_token=token, lease_expires_at=now + timedelta(seconds=lease_seconds), attempts=OutboxJob.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(
+                select(OutboxJob.id, User.telegram_id, OutboxJob.tweet_id, OutboxJob.attempts)
+                .join(User, User.id == OutboxJob.user_id)
+                .where(OutboxJob.lease_token == token)
+                .order_by(OutboxJob.id)
+            )
+            jobs = [DeliveryJob(id=row[0], telegram_id=row[1], tweet_id=row[2], attempts=row[3]) for row in result.all()]
+            await self._commit()
+            logger.debug("Claimed %s delivery jobs under lease %s", len(jobs), token)
+            return token, jobs
+        except Exception as e:
+            logger.error("Error in claim_batch: %s", e)
+            await self._rollback()
+            raise
+
+    async def ack(self, job_ids: Sequence[int], token: str) -> int:
+        """
+        Record the jobs as delivered and drop them from the queue in one transaction, only while this worker
+        still holds their lease. A job whose lease ran out and that another worker claimed since is left to
+        that worker. Returns how many jobs were acknowledged.
+        """
+        try:
+            if not job_ids:
+                return 0
+            # Deleting first and recording what was deleted keeps a concurrent claim from slipping in between
+            deleted = (await self.session.execute(
+                delete(OutboxJob)
+                .where(OutboxJob.id.in_(list(job_ids)), OutboxJob.lease_token == token)
+                .returning(OutboxJob.user_id, OutboxJob.tweet_id)
+            )).all()
+            if deleted:
+                delivered_at = datetime.utcnow()
+                await self.session.execute(insert(DeliveredTweet), [
+                    {"user_id": user_id, "tweet_id": tweet_id, "delivered_at": delivered_at} for user_id, tweet_id in deleted
+                ])
+            await self._commit()
+            logger.debug("Acknowledged %s deliveries", len(deleted))
+            return len(deleted)
+        except Exception as e:
+            logger.error("Error in ack: %s", e)
+            await self._rollback()
+            raise
+
+    async def release(self, job_ids: Sequence[int], token: str, error: Optional[str] = None, retry_delay_seconds: int = 30, max_attempts: int = 5):
+        """
+        Give failed jobs back to the queue after a delay, only while this worker still holds their lease.
+        Jobs that used up their attempts are marked failed instead and stay behind as dead letters.
+        """
+        try:
+            if not job_ids:
+                return
+            now = datetime.utcnow()
+            owned = [OutboxJob.id.in_(list(job_ids)), OutboxJob.lease_token == token]
+            await self.session.execute(
+                update(OutboxJob)
+                .where(*owned, OutboxJob.attempts >= max_attempts)
+                .values(lease_token=None, lease_expires_at=None, last_error=error, failed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await self.session.execute(
+                update(OutboxJob)
+                .where(*owned, OutboxJob.attempts < max_attempts)
+                .values(
+                    lease_token=None, lease_expires_at=None, last_error=error,
+                    available_at=now + timedelta(seconds=retry_delay_seconds)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await self._commit()
+        except Exception as e:
+            logger.error("Error in release: %s", e)
+            await self._rollback()
+            raise
+
+    async def requeue_failed(self) -> int:
+        """Give every dead letter a fresh set of attempts"""
+        try:
+            result = await self.session.execute(
+                update(OutboxJob)
+                .where(OutboxJob.failed_at.is_not(None))
+                .values(failed_at=None, attempts=0, available_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await self._commit()
+            logger.info("Requeued %s failed deliveries", result.rowcount)
+            return result.rowcount
+        except Exception as e:
+            logger.error("Error in requeue_failed: %s", e)
+            await self._rollback()
+            raise
+
+    async def get_backlog(self) -> List[UserDeliveryBacklog]:
+        """Count the queued jobs per user, dead letters are counted apart from the jobs still pending"""
+        try:
+            failed = OutboxJob.failed_at.is_not(None)
+            pending_count = func.count(OutboxJob.id).filter(~failed)
+            result = await self.session.execute(
+                select(User.telegram_id, pending_count, func.count(OutboxJob.id).filter(failed))
+                .join(User, User.id == OutboxJob.user_id)
+                .group_by(User.telegram_id)
+                .order_by(pending_count.desc())
+            )
+            return [UserDeliveryBacklog(telegram_id=row[0], pending=row[1], failed=row[2]) for row in result.all()]
+        except Exception as e:
+            logger.error("Error in get_backlog: %s", e)
+            raise
+
+class CrawlRunRepository(BaseRepository[CrawlRun]):
+    async def record_run(self, started_at: datetime, finished_at: datetime, accounts: List[AccountCrawlStats]) -> int:
+        """Store a finished run and one row per account in a single round of inserts, returns the run id"""
+        try:
+            run = CrawlRun(
+                started_at=started_at, finished_at=finished_at,
+                duration_seconds=round((finished_at - started_at).total_seconds(), 3),
+                accounts=len(accounts),
+                tweets_found=sum(stats.tweets_found for stats in accounts),
+                tweets_inserted=sum(stats.tweets_inserted for stats in accounts),
+                errors=sum(stats.errors for stats in accounts)
+            )
+            self.session.add(run)
+            await self.session.flush()
+            if accounts:
+                account_ids = dict((await self.session.execute(
+                    select(func.lower(TwitterAccount.username), TwitterAccount.id)
+                    .where(func.lower(TwitterAccount.username).in_([stats.username.lower() for stats in accounts]))
+                )).all())
+                await self.session.execute(insert(AccountCrawlStat), [
+                    {
+                        "run_id": run.id, "account_id": account_ids.get(stats.username.lower()), "username": stats.username,
+                        "scrolls": stats.scrolls, "tweets_found": stats.tweets_found, "tweets_fetched": stats.tweets_fetched,
+                        "tweets_inserted": stats.tweets_inserted, "errors": stats.errors, "duration_seconds": round(stats.duration_seconds, 3)
+                    }
+                    for stats in accounts
+                ])
+            await self._commit()
+            logger.debug("Recorded crawl run %s for %s accounts", run.id, len(accounts))
+            return run.id
+        except Exception as e:
+            logger.error("Error in record_run: %s", e)
+            await self._rollback()
+            raise
+
+    async def get_recent_runs(self, limit: int = 10) -> List[CrawlRunStats]:
+        try:
+            result = await self.session.execute(select(CrawlRun).order_by(CrawlRun.started_at.desc()).limit(limit))
+            return [
+                CrawlRunStats(
+                    id=run.id, started_at=run.started_at, finished_at=run.finished_at, duration_seconds=run.duration_seconds,
+                    accounts=run.accounts, tweets_found=run.tweets_found, tweets_inserted=run.tweets_inserted, errors=run.errors
+                )
+                for run in result.scalars().all()
+            ]
+        except Exception as e:
+            logger.error("Error in get_recent_runs: %s", e)
+            raise
+
+    async def get_account_stats(self, run_id: int) -> List[AccountCrawlStats]:
+        try:
+            result = await self.session.execute(
+                select(AccountCrawlStat).where(AccountCrawlStat.run_id == run_id).order_by(AccountCrawlStat.username)
+            )
+            return [
+                AccountCrawlStats(
+                    username=row.username, scrolls=row.scrolls, tweets_found=row.tweets_found, tweets_fetched=row.tweets_fetched,
+                    tweets_inserted=row.tweets_inserted, errors=row.errors, duration_seconds=row.duration_seconds
+                )
+                for row in result.scalars().all()
+            ]
+        except Exception as e:
+            logger.error("Error in get_account_stats: %s", e)
+            raise
+
+
+class DatabaseStatsRepository:
+    """Database wide statistics that are not tied to a single model"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_table_stats(self) -> List[TableStats]:
+        try:
+            stats = []
+            for table in Base.metadata.sorted_tables:
+                result = await self.session.execute(select(func.count()).select_from(table))
+                stats.append(TableStats(name=table.name, rows=result.scalar_one()))
+            return stats
+        except Exception as e:
+            logger.error("Error in get_table_stats: %s", e)
+            raise
+
+    async def get_database_size(self) -> Optional[int]:
+        """Size of the database in bytes, None for dialects without a cheap way to ask"""
+        try:
+            dialect = self.session.bind.dialect.name
+            if dialect == "sqlite":
+                page_count = (await self.session.execute(text("PRAGMA page_count"))).scalar_one()
+                page_size = (await self.session.execute(text("PRAGMA page_size"))).scalar_one()
+                return page_count * page_size
+            if dialect == "postgresql":
+                return (await self.session.execute(text("SELECT pg_database_size(current_database())"))).scalar_one()
+            return None
+        except Exception as e:
+            logger.error("Error in get_database_size: %s", e)
+            raise
+
+
+class RetentionRepository:
+    """
+    Moves tweets past the retention window, and the rows that hang off them, into the archive tables.
+    Fingerprints and LSH buckets stay where they are, a few dozen bytes per tweet keep reposts of archived
+    tweets detectable, tweet ids are the same in both tables.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _expired(cutoff: datetime):
+        # The newest tweet is never archived, SQLite would otherwise hand its id out again once `tweets` is empty
+        newest = select(func.max(TweetModel.id)).scalar_subquery()
+        return and_(TweetModel.created_at < cutoff, TweetModel.id < newest)
+
+    async def count_expired(self, cutoff: datetime) -> int:
+        try:
+            result = await self.session.execute(select(func.count(TweetModel.id)).where(self._expired(cutoff)))
+            return result.scalar_one()
+        except Exception as e:
+            logger.error("Error in count_expired: %s", e)
+            raise
+
+    async def archive_batch(self, cutoff: datetime, batch_size: int = 1000) -> Tuple[int, int]:
+        """Archive up to batch_size of the oldest expired tweets in one transaction, returns (tweets, deliveries) moved"""
+        try:
+            ids = (await self.session.execute(
+                select(TweetModel.id).where(self._expired(cutoff)).order_by(TweetModel.id).limit(batch_size)
+            )).scalars().all()
+            if not ids:
+                return 0, 0
+
+            tweets = (await self.session.execute(
+                select(
+                    TweetModel.id, TweetModel.twitter_id, TweetModel.created_at, TweetModel.account_id,
+                    TweetModel.category_id, TweetModel.text, TweetModel.media_urls
+                ).where(TweetModel.id.in_(ids))
+            )).all()
+            await self.session.execute(insert(ArchivedTweet), [
+                {
+                    "id": tweet.id, "twitter_id": tweet.twitter_id, "created_at": tweet.created_at,
+                    "account_id": tweet.account_id, "category_id": tweet.category_id,
+                    "payload": zlib.compress(json.dumps({"text": tweet.text, "media_urls": tweet.media_urls}).encode()),
+                    "archived_at": datetime.utcnow()
+                }
+                for tweet in tweets
+            ])
+            deliveries = await self.session.execute(
+                insert(ArchivedDeliveredTweet).from_select(
+                    ["id", "user_id", "tweet_id", "delivered_at"],
+                    select(DeliveredTweet.id, DeliveredTweet.user_id, DeliveredTweet.tweet_id, DeliveredTweet.delivered_at)
+                    .where(DeliveredTweet.tweet_id.in_(ids))
+                )
+            )
+            for model, key in (
+                    (DeliveredTweet, DeliveredTweet.tweet_id),
+                    (OutboxJob, OutboxJob.tweet_id),
+                    (RenderedMessage, RenderedMessage.tweet_id),
+                    (TweetModel, TweetModel.id)
+            ):
+                await self.session.execute(delete(model).where(key.in_(ids)))
+            await self.session.commit()
+            logger.debug("Archived %s tweets up to ID %s", len(ids), ids[-1])
+            return len(ids), deliveries.rowcount
+        except Exception as e:
+            logger.error("Error in archive_batch: %s", e)
+            await self.session.rollback()
+            raise
+
+    async def get_archived_tweet(self, twitter_id: str) -> Optional[TweetDB]:
+        try:
+            archived = (await self.session.execute(
+                select(ArchivedTweet).where(ArchivedTweet.twitter_id == twitter_id)
+            )).scalars().first()
+            if archived is None:
+                return None
+            payload = json.loads(zlib.decompress(archived.payload))
+            return TweetDB(
+                id=archived.id, twitter_id=archived.twitter_id, account_id=archived.account_id,
+                category_id=archived.category_id, content=payload["text"] or "",
+                media_urls=payload["media_urls"], created_at=archived.created_at
+            )
+        except Exception as e:
+            logger.error("Error in get_archived_tweet: %s", e)
+            raise
+
+    async def vacuum(self):
+        """Reclaim the space freed by archiving and refresh planner statistics"""
+        try:
+            await self.session.commit()
+            dialect = self.session.bind.dialect.name
+            connection = await self.session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            if dialect == "sqlite":
+                statements = ["VACUUM", "ANALYZE"]
+            elif dialect == "postgresql":
+                statements = [f"VACUUM ANALYZE {table.name}" for table in Base.metadata.sorted_tables]
+            else:
+                statements = []
+            for statement in statements:
+                await connection.execute(text(statement))
+            logger.debug("Ran %s", ", ".join(statements) or "nothing")
+        except Exception as e:
+            logger.error("Error in vacuum: %s", e)
+            raise
+
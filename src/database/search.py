@@ -0,0 +1,76 @@
+import logging
+import re
+from typing import List
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from src.database.base import Base
+
+logger = logging.getLogger(__name__)
+
+# External content FTS5 table, the text lives in `tweets` and only the index is stored here
+SQLITE_SEARCH_DDL: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+        text, content='tweets', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_insert AFTER INSERT ON tweets BEGIN
+        INSERT INTO tweets_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_delete AFTER DELETE ON tweets BEGIN
+        INSERT INTO tweets_fts(tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_update AFTER UPDATE OF text ON tweets BEGIN
+        INSERT INTO tweets_fts(tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO tweets_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+# Postgres keeps the index in sync on its own, an expression index is enough
+POSTGRES_SEARCH_DDL: List[str] = [
+    "CREATE INDEX IF NOT EXISTS ix_tweets_text_search ON tweets USING GIN (to_tsvector('english', coalesce(text, '')))",
+]
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def build_fts_query(query: str) -> str:
+    """Turn free text into a safe FTS5 query, every word must match and the last one may be a prefix"""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return ""
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def ensure_search_index(connection: Connection):
+    """Create the full-text index if it is missing and backfill it from existing tweets"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tweets_fts'")
+        ).first()
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            logger.info("Building full-text index over existing tweets")
+            connection.execute(text("INSERT INTO tweets_fts(tweets_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.execute(text(statement))
+    else:
+        logger.warning("Full-text search is not supported on %s, search falls back to LIKE", dialect)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection: Connection, **kwargs):
+    ensure_search_index(connection)
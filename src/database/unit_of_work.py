@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.exc import OperationalError
+
+from src.database.db import get_session_factory
+from src.database.models.models import Category, CrawlRun, OutboxJob, RenderedMessage, Tweet, TweetFingerprint, TwitterAccount, User
+from src.database.models.pydantic_models import DedupConfig
+from src.database.repositories.repositories import (
+    CategoryRepository, CrawlRunRepository, OutboxRepository, RenderedMessageRepository, TweetFingerprintRepository, TweetRepository, TwitterAccountRepository, UserRepository
+)
+from src.database.repositories.base_repo import DIRTY_TABLES
+from src.database.repositories.cache import QueryCache
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar('R')
+
+
+class UnitOfWork:
+    """
+    A short-lived session owned by a single task. Its repositories only flush, everything they write
+    is committed together when the block exits cleanly and rolled back when it raises. A query cache
+    outlives the unit, the account, category and user repositories read through it.
+    """
+
+    def __init__(self, session_factory: Optional["sessionmaker"] = None, dedup_config: Optional[DedupConfig] = None, query_cache: Optional[QueryCache] = None):
+        self._session_factory = session_factory or get_session_factory()
+        self._dedup_config = dedup_config
+        self._query_cache = query_cache
+        self.session = None
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session = self._session_factory()
+        self.tweets = TweetRepository(Tweet, self.session, autocommit=False)
+        self.accounts = TwitterAccountRepository(TwitterAccount, self.session, autocommit=False, cache=self._query_cache)
+        self.categories = CategoryRepository(Category, self.session, autocommit=False, cache=self._query_cache)
+        self.users = UserRepository(User, self.session, autocommit=False, cache=self._query_cache)
+        self.fingerprints = TweetFingerprintRepository(TweetFingerprint, self.session, self._dedup_config, autocommit=False)
+        self.messages = RenderedMessageRepository(RenderedMessage, self.session, autocommit=False)
+        self.outbox = OutboxRepository(OutboxJob, self.session, autocommit=False)
+        self.crawl_runs = CrawlRunRepository(CrawlRun, self.session, autocommit=False)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            await self.session.close()
+
+    async def commit(self):
+        await self.session.commit()
+        # Only now can no other session read the old rows, invalidating on flush would let them be cached again
+        dirty = self.session.info.pop(DIRTY_TABLES, None)
+        if dirty and self._query_cache is not None:
+            self._query_cache.invalidate(dirty)
+
+    async def rollback(self):
+        await self.session.rollback()
+        # Nothing was written, the cached lookups are still right
+        self.session.info.pop(DIRTY_TABLES, None)
+
+
+def is_database_locked(error: BaseException) -> bool:
+    """SQLite reports a busy writer as an OperationalError once busy_timeout runs out"""
+    return isinstance(error, OperationalError) and "locked" in str(error.orig if error.orig else error).lower()
+
+
+async def run_in_unit_of_work(
+        work: Callable[[UnitOfWork], Awaitable[R]],
+        session_factory: Optional["sessionmaker"] = None,
+        dedup_config: Optional[DedupConfig] = None,
+        attempts: int = 5,
+        query_cache: Optional[QueryCache] = None,
+        base_delay: float = 0.05
+) -> R:
+    """
+    Run `work` in its own unit of work and commit it. When SQLite is still locked after busy_timeout the
+    whole unit is rolled back and retried with jittered exponential backoff, so `work` must be safe to repeat.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            async with UnitOfWork(session_factory, dedup_config, query_cache) as uow:
+                return await work(uow)
+        except OperationalError as e:
+            if attempt == attempts or not is_database_locked(e):
+                raise
+            delay = base_delay * 2 ** (attempt - 1) * (1 + random.random())
+            logger.warning("Database is locked, retrying in %.2fs (attempt %s of %s)", delay, attempt, attempts)
+            await asyncio.sleep(delay)
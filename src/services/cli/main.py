@@ -1,24 +1,152 @@
 import argparse
 import asyncio
-from unicodedata import category
-from rich.console import  Console
+from datetime import datetime
 
-from src.database.db import get_session
-from src.services.cli.tools import PrintTable, DbInfoGetter
-from src.database.repositories.repositories import TwitterAccountRepository, CategoryRepository
-from src.database.models.models import TwitterAccount, Category
+# Every command imports what it needs inside build_operation/main, so `--help` and the
+# commands that never touch the database do not pay for SQLAlchemy, pydantic or Playwright.
 
 
-async def main():
-    async with get_session() as session:
-        account_repo = TwitterAccountRepository(TwitterAccount, session)
-        category_repo = CategoryRepository(Category, session)
-        db_info_getter = DbInfoGetter(accounts_repo=account_repo, categories_repo=category_repo)
-        await db_info_getter.show_current_categories()
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Twitter2TelTech operations console")
+    parser.add_argument("--profile", metavar="PATH", help="Profile the command and write the result to PATH")
+    parser.add_argument("--profiler", choices=["cprofile", "sampling"], default="cprofile",
+                        help="cprofile writes a pstats file, sampling writes folded stacks for flame graphs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("categories", help="Show the configured categories")
+
+    crawl = commands.add_parser("crawl", help="Crawl accounts now")
+    crawl.add_argument("--accounts", nargs="+", help="Usernames to crawl, defaults to every account in the database")
+    crawl.add_argument("--days", type=int, default=10, help="How many days back to crawl")
+    crawl.add_argument("--headless", action="store_true", help="Run the browser without a window")
+
+    stats = commands.add_parser("stats", help="Show database statistics")
+    stats.add_argument("what", choices=["accounts", "delivery", "db", "runs"],
+                       help="accounts: tweet counts and freshness, delivery: queued deliveries, db: table sizes, runs: recent crawls")
+    stats.add_argument("--run", type=int, help="With runs, show the per-account stats of this run")
+
+    search = commands.add_parser("search", help="Full-text search over stored tweets")
+    search.add_argument("query", help="Words to search for, the last one may be a prefix")
+    search.add_argument("--category", help="Only tweets of this category name")
+    search.add_argument("--account", help="Only tweets of this account")
+    search.add_argument("--since", type=datetime.fromisoformat, help="Only tweets created at or after this ISO date")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--cursor", help="Cursor printed by the previous page")
+
+    export = commands.add_parser("export", help="Stream tweets to a JSONL or Parquet file")
+    export.add_argument("path", help="Output file, .jsonl.gz is gzip compressed")
+    export.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl", help="parquet needs pyarrow")
+    export.add_argument("--category", help="Only tweets of this category name")
+    export.add_argument("--since", type=datetime.fromisoformat, help="Only tweets created at or after this ISO date")
+    export.add_argument("--until", type=datetime.fromisoformat, help="Only tweets created before this ISO date")
+    export.add_argument("--incremental", metavar="MARKER",
+                        help="Only tweets added since the last export with this marker name, then move the marker")
+    export.add_argument("--batch-size", type=int, default=5000, help="Rows read and written per batch")
+
+    retention = commands.add_parser("retention", help="Archive tweets older than the retention window")
+    retention.add_argument("--hot-days", type=int, help="Days of tweets to keep in the hot tables, defaults to RETENTION_HOT_DAYS")
+    retention.add_argument("--batch-size", type=int, help="Tweets archived per transaction")
+    retention.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM/ANALYZE after archiving")
+    retention.add_argument("--dry-run", action="store_true", help="Only count the tweets that would be archived")
+
+    deliver = commands.add_parser("deliver", help="Send queued tweets to subscribers")
+    deliver.add_argument("--once", action="store_true", help="Stop once the queue is empty instead of waiting for more")
+    deliver.add_argument("--batch-size", type=int, help="Jobs claimed per batch, defaults to DELIVERY_BATCH_SIZE")
+    deliver.add_argument("--backfill", action="store_true", help="First queue every subscribed tweet that was never delivered")
+    deliver.add_argument("--since", type=datetime.fromisoformat, help="Only backfill tweets created at or after this ISO date")
+    deliver.add_argument("--retry-failed", action="store_true", help="First give deliveries that used up their attempts a fresh start")
+
+    # The benchmark options live in src.benchmarks.runner, they are parsed there so it is only imported when needed
+    commands.add_parser("bench", help="Run the offline benchmark suite, see `bench --help`", add_help=False)
+    return parser
+
+
+def build_operation(args: argparse.Namespace, session):
+    from src.services.cli.tools import DbInfoGetter, ShowCategories, ShowAccountStats, ShowDeliveryBacklog, ShowDatabaseSize, RunCrawl, SearchTweets
+    from src.database.repositories.repositories import TwitterAccountRepository, CategoryRepository, DatabaseStatsRepository
+    from src.database.models.models import TwitterAccount, Category, Tweet
 
+    account_repo = TwitterAccountRepository(TwitterAccount, session)
+    category_repo = CategoryRepository(Category, session)
 
+    if args.command == "categories":
+        return ShowCategories(DbInfoGetter(accounts_repo=account_repo, categories_repo=category_repo))
+    if args.command == "crawl":
+        return RunCrawl(account_repo, args.accounts, args.days, args.headless)
+    if args.command == "stats" and args.what == "accounts":
+        return ShowAccountStats(account_repo)
+    if args.command == "stats" and args.what == "delivery":
+        from src.database.repositories.repositories import OutboxRepository
+        from src.database.models.models import OutboxJob
+        return ShowDeliveryBacklog(OutboxRepository(OutboxJob, session))
+    if args.command == "stats" and args.what == "db":
+        return ShowDatabaseSize(DatabaseStatsRepository(session))
+    if args.command == "stats" and args.what == "runs":
+        from src.services.cli.tools import ShowCrawlRuns
+        from src.database.repositories.repositories import CrawlRunRepository
+        from src.database.models.models import CrawlRun
+        return ShowCrawlRuns(CrawlRunRepository(CrawlRun, session), args.run)
+    if args.command == "search":
+        from src.database.repositories.repositories import TweetRepository
+        return SearchTweets(TweetRepository(Tweet, session), args.query, args.category, args.account, args.since, args.limit, args.cursor)
+    if args.command == "export":
+        from src.services.cli.tools import ExportTweets
+        from src.database.repositories.repositories import TweetRepository, ExportMarkerRepository
+        from src.database.models.models import ExportMarker
+        return ExportTweets(
+            TweetRepository(Tweet, session), ExportMarkerRepository(ExportMarker, session), args.path, args.format,
+            args.category, args.since, args.until, args.incremental, args.batch_size
+        )
+    if args.command == "retention":
+        from src.services.cli.tools import RunRetention
+        from src.database.repositories.repositories import RetentionRepository
+        from src.core.config import RETENTION_CONFIG
+        overrides = {"hot_days": args.hot_days, "batch_size": args.batch_size, "vacuum": False if args.no_vacuum else None}
+        config = RETENTION_CONFIG.model_copy(update={key: value for key, value in overrides.items() if value is not None})
+        return RunRetention(RetentionRepository(session), DatabaseStatsRepository(session), config, args.dry_run)
+    if args.command == "deliver":
+        from src.services.cli.tools import RunDelivery
+        from src.database.repositories.repositories import OutboxRepository
+        from src.database.models.models import OutboxJob
+        from src.core.config import DELIVERY_CONFIG, RENDER_CONFIG
+        config = DELIVERY_CONFIG.model_copy(update={"batch_size": args.batch_size} if args.batch_size else {})
+        return RunDelivery(OutboxRepository(OutboxJob, session), config, RENDER_CONFIG.cache_size, args.once, args.backfill, args.since, args.retry_failed)
+    raise ValueError(f"Unknown command: {args.command}")
+
+
+async def main(args: argparse.Namespace):
+    if args.command == "bench":
+        from src.benchmarks.runner import build_parser as build_bench_parser, config_from_args
+        from src.services.cli.tools import RunBenchmark
+
+        bench_args = build_bench_parser().parse_args(args.bench_args)
+        await RunBenchmark(config_from_args(bench_args), bench_args.output).execute()
+        return None
+
+    from src.database.db import get_session, init_db
+
+    # Databases created before the outbox, search, dedup and run tables existed get them here
+    await init_db()
+    async with get_session() as session:
+        await build_operation(args, session).execute()
         return None
 
 
+def run(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.profile:
+        from src.services.cli.profiling import profile
+
+        with profile(args.profile, args.profiler):
+            asyncio.run(main(args))
+    else:
+        asyncio.run(main(args))
+
+
 if __name__=="__main__":
-    asyncio.run(main())
+    run()
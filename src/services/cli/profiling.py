@@ -0,0 +1,81 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread at a fixed interval and writes folded stacks
+
+    The output is the collapsed format consumed by flamegraph.pl and speedscope, one
+    `frame;frame;frame count` line per unique stack.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: str):
+        with open(path, "w") as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile(path: str, profiler: str = "cprofile", top: int = 25):
+    """Profile the wrapped block and write the result to `path`
+
+    cprofile writes a pstats file and prints the top functions by cumulative time,
+    sampling writes folded stacks.
+    """
+    started = time.perf_counter()
+    if profiler == "sampling":
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(path)
+            print(f"Wrote {sum(sampler.samples.values())} samples over {time.perf_counter() - started:.1f}s to {path}")
+        return
+
+    tracer = cProfile.Profile()
+    tracer.enable()
+    try:
+        yield
+    finally:
+        tracer.disable()
+        tracer.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(tracer, stream=output).sort_stats("cumulative").print_stats(top)
+        print(output.getvalue())
+        print(f"Wrote profile of {time.perf_counter() - started:.1f}s to {path}")
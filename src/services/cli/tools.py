@@ -1,15 +1,19 @@
 from rich import print
 from rich import box
+from rich.markup import escape
 from rich.table import Table
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, List, Tuple, Set, Union
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Dict, List, Tuple, Set, Union
 from async_property import async_cached_property
 
-from src.database.models.models import TwitterAccount, Category, Tweet
-from src.database.models.pydantic_models import CategoryDbObject
-from src.database.repositories.repositories import TwitterAccountRepository, CategoryRepository, TweetRepository
 from src.utils.common import get_map_ids_to_categories
 
+if TYPE_CHECKING:
+    # Only needed for annotations, importing them eagerly pulls SQLAlchemy into every command
+    from src.database.models.pydantic_models import BenchmarkConfig, RetentionConfig, DeliveryConfig
+    from src.database.repositories.repositories import TwitterAccountRepository, CategoryRepository, DatabaseStatsRepository, TweetRepository, ExportMarkerRepository, RetentionRepository, OutboxRepository, CrawlRunRepository
+
 class Operation(ABC):
     @abstractmethod
     async def execute(self):
@@ -24,6 +28,7 @@ class PrintTable(Table):
             box_style: Optional[box.Box] = box.HEAVY_EDGE,
             show_header: bool = True,
             show_lines: bool = True,
+            wrap_columns: Tuple[str, ...] = (),
             *args,
             **kwargs
     ):
@@ -36,15 +41,15 @@ class PrintTable(Table):
             **kwargs
         )
 
-        # Add columns
+        # Add columns, long free text wraps so it does not squeeze the short columns next to it
         for column in columns:
-            self.add_column(column, style="cyan", no_wrap=True)
+            self.add_column(column, style="cyan", no_wrap=column not in wrap_columns)
 
     def add_row_data(self, *args):
         self.add_row(*args)
 
 class DbInfoGetter:
-    def __init__(self, categories_repo: CategoryRepository, accounts_repo: TwitterAccountRepository):
+    def __init__(self, categories_repo: "CategoryRepository", accounts_repo: "TwitterAccountRepository"):
         self._categories_repo = categories_repo
         self._accounts_repo = accounts_repo
         self._cached_mapped_category_ids = None
@@ -68,4 +73,232 @@ class DbInfoGetter:
     async def show_current_categories(self):
         if self._cached_category_id_name is None:
             await self.category_id_name
-        print(self._cached_category_id_name)
\ No newline at end of file
+        print(self._cached_category_id_name)
+
+
+def _format_datetime(value: Optional[datetime]) -> str:
+    return value.strftime('%Y-%m-%d %H:%M') if value else "-"
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return "unknown"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+class ShowCategories(Operation):
+    def __init__(self, db_info_getter: DbInfoGetter):
+        self._db_info_getter = db_info_getter
+
+    async def execute(self):
+        await self._db_info_getter.show_current_categories()
+
+
+class ShowAccountStats(Operation):
+    def __init__(self, accounts_repo: "TwitterAccountRepository"):
+        self._accounts_repo = accounts_repo
+
+    async def execute(self):
+        table = PrintTable("Accounts", ["Account", "Tweets", "Latest tweet", "Last fetched"])
+        for stats in await self._accounts_repo.get_account_stats():
+            table.add_row_data(
+                stats.username,
+                str(stats.tweet_count),
+                _format_datetime(stats.latest_tweet_at),
+                _format_datetime(stats.last_fetched)
+            )
+        print(table)
+
+
+class ShowDeliveryBacklog(Operation):
+    def __init__(self, outbox_repo: "OutboxRepository"):
+        self._outbox_repo = outbox_repo
+
+    async def execute(self):
+        backlog = await self._outbox_repo.get_backlog()
+        table = PrintTable("Delivery backlog", ["Telegram ID", "Pending tweets", "Failed"])
+        for entry in backlog:
+            table.add_row_data(str(entry.telegram_id), str(entry.pending), str(entry.failed))
+        print(table)
+        print(f"Total pending deliveries: {sum(entry.pending for entry in backlog)}")
+        print(f"Failed deliveries: {sum(entry.failed for entry in backlog)}, `deliver --retry-failed` queues them again")
+
+
+class ShowDatabaseSize(Operation):
+    def __init__(self, db_stats_repo: "DatabaseStatsRepository"):
+        self._db_stats_repo = db_stats_repo
+
+    async def execute(self):
+        table = PrintTable("Tables", ["Table", "Rows"])
+        for stats in await self._db_stats_repo.get_table_stats():
+            table.add_row_data(stats.name, str(stats.rows))
+        print(table)
+        print(f"Database size: {_format_bytes(await self._db_stats_repo.get_database_size())}")
+
+
+class ShowCrawlRuns(Operation):
+    def __init__(self, crawl_runs_repo: "CrawlRunRepository", run_id: Optional[int] = None):
+        self._crawl_runs_repo = crawl_runs_repo
+        self._run_id = run_id
+
+    async def execute(self):
+        if self._run_id is not None:
+            table = PrintTable(f"Crawl run {self._run_id}", ["Account", "Scrolls", "Found", "Fetched", "Inserted", "Errors", "Duration"])
+            for stats in await self._crawl_runs_repo.get_account_stats(self._run_id):
+                table.add_row_data(
+                    stats.username, str(stats.scrolls), str(stats.tweets_found), str(stats.tweets_fetched),
+                    str(stats.tweets_inserted), str(stats.errors), f"{stats.duration_seconds:.1f}s"
+                )
+            print(table)
+            return
+        table = PrintTable("Crawl runs", ["Run", "Started", "Duration", "Accounts", "Found", "Inserted", "Errors"])
+        for run in await self._crawl_runs_repo.get_recent_runs():
+            table.add_row_data(
+                str(run.id), _format_datetime(run.started_at), f"{run.duration_seconds:.1f}s", str(run.accounts),
+                str(run.tweets_found), str(run.tweets_inserted), str(run.errors)
+            )
+        print(table)
+
+
+class SearchTweets(Operation):
+    def __init__(self, tweets_repo: "TweetRepository", query: str, category: Optional[str], account: Optional[str], since: Optional[datetime], limit: int, cursor: Optional[str]):
+        self._tweets_repo = tweets_repo
+        self._query = query
+        self._category = category
+        self._account = account
+        self._since = since
+        self._limit = limit
+        self._cursor = cursor
+
+    async def execute(self):
+        from src.core.exceptions import InvalidCursorError
+
+        try:
+            page = await self._tweets_repo.search(
+                self._query, category=self._category, account=self._account,
+                since=self._since, limit=self._limit, cursor=self._cursor
+            )
+        except InvalidCursorError as e:
+            # The cursor is user input, keep rich from reading brackets in it as markup
+            print(escape(str(e)))
+            return
+        table = PrintTable(f"Search: {self._query}", ["Account", "Category", "Created", "Text"], wrap_columns=("Text",))
+        for result in page.results:
+            table.add_row_data(result.username or "-", result.category or "-", _format_datetime(result.created_at), result.text or "")
+        print(table)
+        if page.next_cursor:
+            print(f"Next page: --cursor {page.next_cursor}")
+
+
+class ExportTweets(Operation):
+    def __init__(self, tweets_repo: "TweetRepository", markers_repo: "ExportMarkerRepository", path: str, format: str, category: Optional[str], since: Optional[datetime], until: Optional[datetime], marker: Optional[str], batch_size: int):
+        self._tweets_repo = tweets_repo
+        self._markers_repo = markers_repo
+        self._path = path
+        self._format = format
+        self._category = category
+        self._since = since
+        self._until = until
+        self._marker = marker
+        self._batch_size = batch_size
+
+    async def execute(self):
+        from src.services.export.exporter import export_tweets
+
+        result = await export_tweets(
+            self._tweets_repo, self._path, self._format, category=self._category, since=self._since, until=self._until,
+            marker_repo=self._markers_repo, marker=self._marker, batch_size=self._batch_size
+        )
+        print(f"Exported {result.rows} tweets to {result.path} in {result.elapsed_seconds}s")
+        if self._marker:
+            print(f"Marker {self._marker} is at tweet ID {result.last_tweet_id}")
+
+
+class RunRetention(Operation):
+    def __init__(self, retention_repo: "RetentionRepository", db_stats_repo: "DatabaseStatsRepository", config: "RetentionConfig", dry_run: bool = False):
+        self._retention_repo = retention_repo
+        self._db_stats_repo = db_stats_repo
+        self._config = config
+        self._dry_run = dry_run
+
+    async def execute(self):
+        from datetime import timedelta
+        from src.services.retention.archiver import run_retention
+
+        if self._dry_run:
+            cutoff = datetime.utcnow() - timedelta(days=self._config.hot_days)
+            expired = await self._retention_repo.count_expired(cutoff)
+            print(f"{expired} tweets are older than {_format_datetime(cutoff)} and would be archived")
+            return
+
+        result = await run_retention(self._retention_repo, self._config, self._db_stats_repo)
+        print(f"Archived {result.tweets_archived} tweets and {result.deliveries_archived} deliveries "
+              f"older than {_format_datetime(result.cutoff)} in {result.elapsed_seconds}s")
+        print(f"Database size: {_format_bytes(result.size_before)} -> {_format_bytes(result.size_after)}")
+
+
+class RunDelivery(Operation):
+    def __init__(self, outbox_repo: "OutboxRepository", config: "DeliveryConfig", cache_size: int, once: bool = False, backfill: bool = False, since: Optional[datetime] = None, retry_failed: bool = False):
+        self._outbox_repo = outbox_repo
+        self._config = config
+        self._cache_size = cache_size
+        self._once = once
+        self._backfill = backfill
+        self._since = since
+        self._retry_failed = retry_failed
+
+    async def execute(self):
+        from httpx import AsyncClient
+        from src.services.telegram.delivery import DeliveryWorker, TelegramBotSender
+        from src.services.telegram.render import RenderedMessageCache
+
+        if not self._config.bot_token:
+            print("TELEGRAM_BOT_TOKEN is not set")
+            return
+        if self._retry_failed:
+            print(f"Requeued {await self._outbox_repo.requeue_failed()} failed deliveries")
+        if self._backfill:
+            print(f"Queued {await self._outbox_repo.enqueue_backlog(self._since)} deliveries")
+        async with AsyncClient(timeout=30.0) as client:
+            worker = DeliveryWorker(TelegramBotSender(self._config.bot_token, client), message_cache=RenderedMessageCache(self._cache_size), config=self._config)
+            await worker.run(once=self._once)
+
+
+class RunCrawl(Operation):
+    def __init__(self, accounts_repo: "TwitterAccountRepository", usernames: Optional[List[str]], days: int, headless: bool):
+        self._accounts_repo = accounts_repo
+        self._usernames = usernames
+        self._days = days
+        self._headless = headless
+
+    async def execute(self):
+        from src.services.crawler.twitter import main as crawl
+
+        usernames = self._usernames or list(await self._accounts_repo.get_twitter_accounts())
+        if not usernames:
+            print("No accounts to crawl")
+            return
+        print(f"Crawling {len(usernames)} accounts over the last {self._days} days")
+        await crawl(usernames=usernames, days=self._days, headless=self._headless)
+
+
+class RunBenchmark(Operation):
+    def __init__(self, config: "BenchmarkConfig", output: Optional[str] = None):
+        self._config = config
+        self._output = output
+
+    async def execute(self):
+        from src.benchmarks.runner import run_benchmark
+
+        result = await run_benchmark(self._config)
+        table = PrintTable("Benchmark", ["Metric", "Value"])
+        for name, value in result.model_dump().items():
+            table.add_row_data(name, str(value))
+        print(table)
+        if self._output:
+            with open(self._output, "w") as file:
+                file.write(result.model_dump_json(indent=2))
@@ -0,0 +1,135 @@
+from typing import TYPE_CHECKING, Optional, Dict, Any
+import logging
+
+from src.database.models.pydantic_models import BrowserRecycleConfig, PageMemoryMetrics
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page, CDPSession
+
+logger = logging.getLogger(__name__)
+
+BYTES_IN_MB = 1024 * 1024
+
+
+class BrowserSession:
+    """Owns the context/page pair used for scraping and recycles it to bound browser memory"""
+
+    def __init__(self, browser: "Browser", recycle_config: BrowserRecycleConfig, context_options: Optional[Dict[str, Any]] = None, default_timeout: int = 100000):
+        self.browser = browser
+        self.recycle_config = recycle_config
+        self.context_options = context_options or {}
+        self.default_timeout = default_timeout
+
+        self._context: Optional["BrowserContext"] = None
+        self._page: Optional["Page"] = None
+        self._cdp: Optional["CDPSession"] = None
+        self._storage_state: Optional[Dict[str, Any]] = None
+        self._accounts_since_recycle = 0
+        self._scrolls_since_recycle = 0
+        self.recycle_count = 0
+
+    async def get_page(self) -> "Page":
+        """Return the current page, opening a fresh context if there is none"""
+        if self._page is None:
+            await self._open()
+        return self._page
+
+    async def _open(self):
+        options = dict(self.context_options)
+        if self._storage_state is not None:
+            # Carry cookies and local storage over so the recycled context stays logged in
+            options['storage_state'] = self._storage_state
+
+        self._context = await self.browser.new_context(**options)
+        self._page = await self._context.new_page()
+        self._page.set_default_timeout(self.default_timeout)
+        self._accounts_since_recycle = 0
+        self._scrolls_since_recycle = 0
+
+        try:
+            self._cdp = await self._context.new_cdp_session(self._page)
+            await self._cdp.send('Performance.enable')
+        except Exception as e:
+            # CDP is only available on Chromium, metrics are best effort
+            logger.warning("CDP session unavailable, memory metrics disabled: %s", e)
+            self._cdp = None
+
+    async def close(self):
+        if self._context is not None:
+            try:
+                await self._context.close()
+            except Exception as e:
+                logger.warning("Error closing browser context: %s", e)
+        self._context = None
+        self._page = None
+        self._cdp = None
+
+    async def recycle(self, reason: str):
+        """Close the current context, the next get_page opens a new one with the same storage state"""
+        logger.info("Recycling browser context (%s)", reason)
+        if self._context is not None:
+            try:
+                self._storage_state = await self._context.storage_state()
+            except Exception as e:
+                logger.warning("Could not save storage state before recycle: %s", e)
+        await self.close()
+        self.recycle_count += 1
+
+    async def get_memory_metrics(self) -> Optional[PageMemoryMetrics]:
+        """Measure the JS heap and DOM size of the current page through CDP"""
+        if self._cdp is None:
+            return None
+        try:
+            heap = await self._cdp.send('Runtime.getHeapUsage')
+            performance = await self._cdp.send('Performance.getMetrics')
+            metrics = {metric['name']: metric['value'] for metric in performance.get('metrics', [])}
+            return PageMemoryMetrics(
+                js_heap_used_mb=heap['usedSize'] / BYTES_IN_MB,
+                js_heap_total_mb=heap['totalSize'] / BYTES_IN_MB,
+                dom_nodes=int(metrics.get('Nodes', 0)),
+                documents=int(metrics.get('Documents', 0)),
+                js_event_listeners=int(metrics.get('JSEventListeners', 0))
+            )
+        except Exception as e:
+            logger.warning("Failed to read memory metrics: %s", e)
+            return None
+
+    def record_scroll(self):
+        self._scrolls_since_recycle += 1
+
+    async def should_recycle(self, memory: Optional[PageMemoryMetrics] = None) -> Optional[str]:
+        """Return the reason the context should be recycled, or None if it is still healthy"""
+        if self._page is None:
+            return None
+
+        if self._accounts_since_recycle >= self.recycle_config.max_accounts_per_context:
+            return f"{self._accounts_since_recycle} accounts scraped"
+
+        if self._scrolls_since_recycle >= self.recycle_config.max_scrolls_per_context:
+            return f"{self._scrolls_since_recycle} scrolls performed"
+
+        if memory is None:
+            # Two CDP round-trips, after scrolls only every memory_check_every_scrolls-th one pays for them
+            if self._scrolls_since_recycle % max(1, self.recycle_config.memory_check_every_scrolls):
+                return None
+            memory = await self.get_memory_metrics()
+        if memory and memory.js_heap_used_mb >= self.recycle_config.max_js_heap_mb:
+            return f"JS heap at {memory.js_heap_used_mb:.1f}MB"
+
+        return None
+
+    async def finish_account(self, account: str) -> Optional[PageMemoryMetrics]:
+        """Log memory metrics for a finished account and recycle the context if a threshold is hit"""
+        self._accounts_since_recycle += 1
+        memory = await self.get_memory_metrics()
+        if memory:
+            logger.info(
+                "Memory after account %s: heap %.1f/%.1fMB, %s DOM nodes, %s documents, %s listeners",
+                account, memory.js_heap_used_mb, memory.js_heap_total_mb,
+                memory.dom_nodes, memory.documents, memory.js_event_listeners
+            )
+
+        reason = await self.should_recycle(memory)
+        if reason:
+            await self.recycle(reason)
+        return memory
@@ -0,0 +1,112 @@
+import logging
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.utils.common import tweet_created_at
+
+logger = logging.getLogger(__name__)
+
+
+class FoundTweets:
+    """
+    Ids and timestamps of the tweets found for one account, kept as two parallel int64 arrays.
+    A found tweet costs 16 bytes here instead of a pydantic model holding an int and a datetime.
+    """
+    __slots__ = ("ids", "timestamps")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.timestamps = array('q')  # Epoch seconds, UTC
+
+    def append(self, tweet_id: int, timestamp: int):
+        self.ids.append(tweet_id)
+        self.timestamps.append(timestamp)
+
+    def extend(self, tweets: List[Tuple[int, int]]):
+        for tweet_id, timestamp in tweets:
+            self.append(tweet_id, timestamp)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.ids, self.timestamps)
+
+    @property
+    def last_id(self) -> Optional[int]:
+        return self.ids[-1] if self.ids else None
+
+
+class FetchedTweet:
+    """The fields of a vxtwitter response that get stored, the rest of the response is dropped right after the fetch"""
+    __slots__ = ("tweet_id", "username", "date", "date_epoch", "text", "media_urls")
+
+    def __init__(self, tweet_id: str, username: str, date: str, date_epoch: Optional[int], text: Optional[str], media_urls: Optional[List[str]]):
+        self.tweet_id = tweet_id
+        self.username = username
+        self.date = date
+        self.date_epoch = date_epoch
+        self.text = text
+        self.media_urls = media_urls
+
+    @classmethod
+    def from_vxtwitter(cls, data: Dict) -> "FetchedTweet":
+        return cls(
+            tweet_id=str(data['tweetID']),
+            username=data['user_screen_name'],
+            date=data['date'],
+            date_epoch=data.get('date_epoch'),
+            text=data['text'],
+            media_urls=data['mediaURLs']
+        )
+
+
+class StoredTweet:
+    """
+    A tweet as it was inserted, with the id the database gave it. Carries the attributes the steps after
+    the insert read from a Tweet, fingerprinting, rendering and queueing, without an ORM instance per tweet.
+    """
+    __slots__ = ("id", "twitter_id", "account_id", "category_id", "text", "media_urls", "created_at")
+
+    def __init__(self, id: int, row: Dict[str, Any]):
+        self.id = id
+        self.twitter_id = row["twitter_id"]
+        self.account_id = row["account_id"]
+        self.category_id = row["category_id"]
+        self.text = row["text"]
+        self.media_urls = row["media_urls"]
+        self.created_at = row["created_at"]
+
+
+def tweet_rows(tweets: List[FetchedTweet], account_mapping: Dict[str, Tuple[int, int]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Turn fetched tweets into rows ready for a bulk insert into `tweets`. The creation time comes from
+    date_epoch when the response has it and from the fixed-format date parser otherwise. Tweets of an
+    account without a category mapping and tweets whose date cannot be read are logged and skipped,
+    returns the rows and how many tweets were skipped.
+    """
+    # The API may spell a handle differently than it was stored
+    folded = {username.lower(): ids for username, ids in account_mapping.items()}
+    rows = []
+    skipped = 0
+    for tweet in tweets:
+        ids = account_mapping.get(tweet.username) or folded.get(tweet.username.lower())
+        if ids is None:
+            logger.error("Skipping tweet %s, account %s has no category mapping", tweet.tweet_id, tweet.username)
+            skipped += 1
+            continue
+        created_at = tweet_created_at(tweet.date_epoch, tweet.date)
+        if created_at is None:
+            logger.error("Skipping tweet %s, its date cannot be read", tweet.tweet_id)
+            skipped += 1
+            continue
+        account_id, category_id = ids
+        rows.append({
+            "twitter_id": tweet.tweet_id,
+            "account_id": int(account_id),
+            "category_id": int(category_id),
+            "text": tweet.text,
+            "media_urls": tweet.media_urls,
+            "created_at": created_at
+        })
+    return rows, skipped
@@ -1,40 +1,49 @@
-from playwright.async_api import async_playwright, Page, Browser, TimeoutError as PlaywrightTimeoutError
-from typing import List, Set, Optional, Dict, Any, Tuple
+from typing import TYPE_CHECKING, List, Set, Optional, Dict, Any, Tuple
 from contextlib import asynccontextmanager
+import asyncio
 import random
+import time
 from datetime import datetime, timedelta, timezone
 import re
 import logging
 import  traceback
-from pydantic import ValidationError
 from collections import defaultdict
-from async_property import async_property
 
-from src.utils.common import get_map_ids_to_categories, parse_date, download_content
-from src.database.models.pydantic_models import Category, TweetDetails,TwitterCredentials, TweetDB, InitialTweetState
+from src.utils.common import get_map_ids_to_categories, download_content
+from src.database.models.pydantic_models import Category, TweetDetails,TwitterCredentials, TweetDB, InitialTweetState, BrowserRecycleConfig, DedupConfig, PipelineConfig, RenderConfig, AccountCrawlStats
 from src.database.models.models import Tweet, twitter_account_categories
 from src.core.exceptions import TwitterAuthError, TwitterScraperError
-from src.database.repositories.repositories import TweetRepository, TwitterAccountRepository, CategoryRepository
+from src.database.repositories.repositories import TweetRepository
+from src.database.repositories.cache import QueryCache
+from src.database.unit_of_work import UnitOfWork, run_in_unit_of_work
+from src.services.crawler.browser import BrowserSession
+from src.services.crawler.records import FoundTweets, FetchedTweet, StoredTweet, tweet_rows
+from src.services.telegram.render import RenderedMessageCache
+from src.utils import metrics
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from playwright.async_api import Page, Browser
+    from sqlalchemy.orm import sessionmaker
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
 class TwitterAuth:
     """Handles Twitter authentication"""
 
-    def __init__(self, credentials: TwitterCredentials):
+    def __init__(self, credentials: TwitterCredentials, settle_delay: float = 9):
         self.credentials: TwitterCredentials = credentials
+        self.settle_delay = settle_delay
 
-    async def _check_login_selector_present(self, page: Page) -> bool:
+    async def _check_login_selector_present(self, page: "Page") -> bool:
         """Check if login is required based on current page state"""
         try:
             await page.wait_for_load_state(timeout=150000)
             login_indicator = await page.query_selector('input[autocomplete="username"], form[action="/i/flow/login"]')
             if login_indicator:
                 logger.info("Login required")
-                logger.info(f"Hey")
+                logger.info("Hey")
                 return True
             logger.info("No login required")
             return False
@@ -42,7 +51,7 @@ class TwitterAuth:
         except Exception:
             return False
 
-    async def _check_auth_token_present(self, page: Page) -> bool:
+    async def _check_auth_token_present(self, page: "Page") -> bool:
         try:
             # Check if there is an Auth token
             cookies = await page.context.cookies()
@@ -54,13 +63,15 @@ class TwitterAuth:
 
 
         except Exception as e:
-            logger.error(f"Error checking auth token: {str(e)}")
+            logger.error("Error checking auth token: %s", e)
             raise
 
-    async def authenticate(self, page: Page) -> bool:
+    async def authenticate(self, page: "Page") -> bool:
         """Perform Twitter authentication in current window"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
         try:
-            await asyncio.sleep(9)
+            await asyncio.sleep(self.settle_delay)
             if not await self._check_login_selector_present(page):
                 logger.info("No login required")
                 return True
@@ -80,7 +91,7 @@ class TwitterAuth:
             pass_entry = await page.query_selector('input[type="password"]')
             if not pass_entry:
                 logger.info("password input not found, trying email input...")
-                logger.info(f"waiting for email input...")
+                logger.info("waiting for email input...")
                 await page.wait_for_selector('input[type="text"]', timeout=15000)
                 await page.fill('input[type="text"]', self.credentials.email)
                 await page.click('button[type="button"]:has-text("Next")')
@@ -100,14 +111,14 @@ class TwitterAuth:
                 return False
 
         except Exception as e:
-            logger.error(f"Authentication error: {str(e)}")
+            logger.error("Authentication error: %s", e)
             raise TwitterAuthError(f"Authentication failed: {str(traceback.format_exc())}")
 
 
 class TwitterScraper:
     """Handles Twitter scraping operations"""
 
-    def __init__(self, auth: TwitterAuth, tweet_db_repo: TweetRepository, username_to_scrape: List[str], days_to_scrape: int, headless: bool = False):
+    def __init__(self, auth: TwitterAuth, tweet_db_repo: TweetRepository, username_to_scrape: List[str], days_to_scrape: int, headless: bool = False, recycle_config: Optional[BrowserRecycleConfig] = None, base_url: str = 'https://twitter.com'):
         self.auth = auth
         self.username_to_scrape = [username.strip('@').lower() for username in username_to_scrape]
         self.days_to_scrape = days_to_scrape
@@ -117,33 +128,43 @@ class TwitterScraper:
         self.headless = headless
         self.tweet_db_repo = tweet_db_repo
         self.current_account = None
-
-
-    def _build_search_urls(self) -> List[str]:
+        # Filled while scraping, the processor adds its own counts and stores them with the run
+        self.account_stats: Dict[str, AccountCrawlStats] = {}
+        self.recycle_config = recycle_config or BrowserRecycleConfig()
+        self.base_url = base_url.rstrip('/')
+        self.context_options = {
+            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/118.0.0.0 Safari/537.36",
+            "ignore_https_errors": True
+        }
+
+    def _build_search_url(self, username: str, max_id: Optional[str] = None) -> str:
         end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=self.days_to_scrape)
 
         end_date_str = end_date.strftime('%Y-%m-%d')
         start_date_str = start_date.strftime('%Y-%m-%d')
 
-        queries = []
-        for username in self.username_to_scrape:
-            query_parts = [
-                f"from:{username}",
-                "-filter:replies",
-                "-filter:retweets",
-                f"since:{start_date_str}",
-                f"until:{end_date_str}"
-            ]
-            query = "%20".join(query_parts)
-            url = f"https://twitter.com/search?q={query}&src=typed_query&f=live"
-            queries.append(url)
-
-        return queries
+        query_parts = [
+            f"from:{username}",
+            "-filter:replies",
+            "-filter:retweets",
+            f"since:{start_date_str}",
+            f"until:{end_date_str}"
+        ]
+        if max_id:
+            # Resume below the last seen tweet after the page has been recycled
+            query_parts.append(f"max_id:{int(max_id) - 1}")
+        query = "%20".join(query_parts)
+        return f"{self.base_url}/search?q={query}&src=typed_query&f=live"
+
+    def _build_search_urls(self) -> List[str]:
+        return [self._build_search_url(username) for username in self.username_to_scrape]
 
     @asynccontextmanager
-    async def _setup_browser(self) -> Browser:
+    async def _setup_browser(self) -> "Browser":
         """Set up browser with appropriate configurations"""
+        from playwright.async_api import async_playwright
+
         async with async_playwright() as p:
             browser = await p.chromium.launch(
                 headless=self.headless,
@@ -155,25 +176,22 @@ class TwitterScraper:
                 ]
             )
 
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/118.0.0.0 Safari/537.36",
-                ignore_https_errors=True
-            )
-
             try:
                 yield browser
             finally:
                 await browser.close()
 
 
-    async def _wait_for_network_idle(self, page: Page, timeout: int = 40000):
+    async def _wait_for_network_idle(self, page: "Page", timeout: int = 40000):
         """Wait for network to become idle"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
         try:
             await page.wait_for_load_state("networkidle", timeout=timeout)
         except PlaywrightTimeoutError:
             logger.warning("Network idle timeout reached")
 
-    async def _extract_tweet_info(self, article) -> Optional[TweetDetails]:
+    async def _extract_tweet_info(self, article) -> Optional[Tuple[int, int]]:
         """Extract essential information from a tweet article element"""
         try:
             article_html = await article.evaluate('element => element.innerHTML')
@@ -188,7 +206,7 @@ class TwitterScraper:
             if not tweet_id_match:
                 return None
 
-            tweet_id = tweet_id_match.group(1)
+            tweet_id = int(tweet_id_match.group(1))
 
             # Get timestamp
             time_element = await article.query_selector('time')
@@ -199,14 +217,13 @@ class TwitterScraper:
             tweet_date = datetime.strptime(datetime_str, '%Y-%m-%dT%H:%M:%S.%fZ')
             tweet_date = tweet_date.replace(tzinfo=timezone.utc)
 
-            return TweetDetails(id=tweet_id, date=tweet_date)
+            return tweet_id, int(tweet_date.timestamp())
 
         except Exception as e:
-            logger.error(f"Error extracting tweet info: {str(e)}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            logger.error("Error extracting tweet info: %s", e, exc_info=True)
             return None
 
-    async def _scroll_page(self, page: Page, consecutive_empty: int = 2):
+    async def _scroll_page(self, page: "Page", consecutive_empty: int = 2):
         """Perform adaptive scrolling with increasing scroll length"""
         try:
             # Base scroll amount increases with consecutive empty results
@@ -220,193 +237,345 @@ class TwitterScraper:
             await page.wait_for_timeout(wait_time)
             await self._wait_for_network_idle(page)
         except Exception as e:
-            logger.warning(f"Scroll error: {str(e)}")
+            logger.warning("Scroll error: %s", e)
             await page.wait_for_timeout(3000)
 
-    async def initial_scrape(self) -> Dict[str, List[Any]]:
+    async def initial_scrape(self) -> Dict[str, FoundTweets]:
         """Main method to scrape tweets"""
         try:
             async with self._setup_browser() as browser:
-                context = await browser.new_context()
-                page = await context.new_page()
-                page.set_default_timeout(100000)
-
-                self.db_ids = set(await self.tweet_db_repo.get_all_ids())
-                all_tweets: Dict[str, List[Any]] = {}
-
-                search_urls = self._build_search_urls()
-                for search_url in search_urls:
-                    await page.goto(search_url, wait_until="domcontentloaded")
-                    logger.info(f"Navigated to search page: {search_url}")
-
-                    self.current_account = re.findall(r'from:(\w+)', search_url)[0]
-                    all_tweets[self.current_account] = []
-
-                    if not await self.auth.authenticate(page):
-                        logger.error("Authentication failed")
-                        raise TwitterAuthError("Authentication failed")
-
-                    cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.days_to_scrape)
-                    last_tweet_date = datetime.now(timezone.utc)
-                    processed_ids: Set[str] = set()
-                    consecutive_empty = 0
-
-                    while last_tweet_date > cutoff_date:
-                        try:
-                            new_tweets = await self._scrape_tweets_from_page(page, processed_ids)
-
-                            if not new_tweets:
-                                consecutive_empty += 1
-                                if consecutive_empty >= 3:
-                                    logger.info(
-                                        f"No new tweets found for account {self.current_account} after {consecutive_empty} attempts")
-                                    break
-                            else:
-                                consecutive_empty = 0
-                                all_tweets[self.current_account].extend(new_tweets)
-                                last_tweet_date = new_tweets[-1].date
-
-                            logger.info(
-                                f"Collected {len(all_tweets[self.current_account])} tweets for account: {self.current_account}. Last tweet date: {last_tweet_date}")
-
-                            if last_tweet_date <= cutoff_date:
-                                logger.info(f"Reached cutoff date: {cutoff_date}")
-                                break
-
-                            await self._scroll_page(page, consecutive_empty)
-
-                        except Exception as e:
-                            logger.error(f"Error during scraping: {str(e)}")
-                            logger.error(f"Full traceback: {traceback.format_exc()}")
-                            await page.wait_for_timeout(2000)
-
+                browser_session = BrowserSession(browser, self.recycle_config, context_options=self.context_options)
+
+                # Search only returns tweets inside the window, older ids never need checking
+                known_since = (self.cutoff_date - timedelta(days=1)).replace(tzinfo=None)
+                self.db_ids = {int(tweet_id) async for tweet_id in self.tweet_db_repo.iter_ids(since=known_since)}
+                # Hand the connection back to the pool, the scrape takes minutes and writers should not wait on it
+                await self.tweet_db_repo.session.close()
+                all_tweets: Dict[str, FoundTweets] = {}
+
+                try:
+                    for username in self.username_to_scrape:
+                        self.current_account = username
+                        stats = self.account_stats[username] = AccountCrawlStats(username=username)
+                        start = time.perf_counter()
+                        all_tweets[username] = await self._scrape_account(browser_session, username, stats)
+                        stats.tweets_found = len(all_tweets[username])
+                        stats.duration_seconds = time.perf_counter() - start
+                        await browser_session.finish_account(username)
+                finally:
+                    await browser_session.close()
+
+                logger.info("Browser context recycled %s times", browser_session.recycle_count)
                 return all_tweets
 
         except Exception as e:
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            logger.error("Scraping failed: %s", e, exc_info=True)
             raise TwitterScraperError(f"Scraping failed: {str(e)}")
 
-    async def _scrape_tweets_from_page(self, page, processed_ids: Set[str]) -> List[Any]:
+    async def _open_search(self, browser_session: BrowserSession, username: str, max_id: Optional[str] = None) -> "Page":
+        page = await browser_session.get_page()
+        search_url = self._build_search_url(username, max_id)
+        with metrics.NAVIGATION_SECONDS.time():
+            await page.goto(search_url, wait_until="domcontentloaded")
+        logger.info("Navigated to search page: %s", search_url)
+
+        with metrics.AUTH_SECONDS.time():
+            authenticated = await self.auth.authenticate(page)
+        if not authenticated:
+            metrics.AUTH_FAILURES.inc()
+            logger.error("Authentication failed")
+            raise TwitterAuthError("Authentication failed")
+        return page
+
+    async def _scrape_account(self, browser_session: BrowserSession, username: str, stats: AccountCrawlStats) -> FoundTweets:
+        page = await self._open_search(browser_session, username)
+        account_tweets = FoundTweets()
+
+        cutoff_date = int((datetime.now(timezone.utc) - timedelta(days=self.days_to_scrape)).timestamp())
+        last_tweet_date = int(datetime.now(timezone.utc).timestamp())
+        processed_ids: Set[int] = set()
+        consecutive_empty = 0
+
+        while last_tweet_date > cutoff_date:
+            try:
+                with metrics.EXTRACTION_SECONDS.time():
+                    new_tweets = await self._scrape_tweets_from_page(page, processed_ids)
+                metrics.TWEETS_FOUND.inc(len(new_tweets))
+
+                if not new_tweets:
+                    consecutive_empty += 1
+                    if consecutive_empty >= 3:
+                        logger.info("No new tweets found for account %s after %s attempts", username, consecutive_empty)
+                        break
+                else:
+                    consecutive_empty = 0
+                    account_tweets.extend(new_tweets)
+                    last_tweet_date = new_tweets[-1][1]
+
+                logger.info("Collected %s tweets for account: %s. Last tweet date: %s", len(account_tweets), username, last_tweet_date)
+
+                if last_tweet_date <= cutoff_date:
+                    logger.info("Reached cutoff date: %s", cutoff_date)
+                    break
+
+                await self._scroll_page(page, consecutive_empty)
+                browser_session.record_scroll()
+                metrics.SCROLLS.inc()
+                stats.scrolls += 1
+
+                reason = await browser_session.should_recycle()
+                if reason:
+                    await browser_session.recycle(reason)
+                    page = None
+                    try:
+                        page = await self._open_search(browser_session, username, max_id=account_tweets.last_id)
+                    except (TwitterAuthError, TwitterScraperError):
+                        raise
+                    except Exception as e:
+                        # Without a page there is nothing left to scroll, keep what was collected so far
+                        logger.error("Could not reopen search for account %s after recycling: %s", username, e, exc_info=True)
+                        stats.errors += 1
+                        break
+
+            except (TwitterAuthError, TwitterScraperError):
+                raise
+            except Exception as e:
+                logger.error("Error during scraping: %s", e, exc_info=True)
+                stats.errors += 1
+                # Not page.wait_for_timeout, the page may be the one that just failed or was closed
+                await asyncio.sleep(2)
+
+        return account_tweets
+
+    async def _scrape_tweets_from_page(self, page, processed_ids: Set[int]) -> List[Tuple[int, int]]:
         articles = await page.query_selector_all('article[data-testid="tweet"]')
         new_tweets = []
 
         for article in articles:
             tweet = await self._extract_tweet_info(article)
-            if tweet and tweet.id not in processed_ids and tweet.id not in self.db_ids:
+            if tweet and tweet[0] not in processed_ids and tweet[0] not in self.db_ids:
                 new_tweets.append(tweet)
-                processed_ids.add(tweet.id)
+                processed_ids.add(tweet[0])
 
         return new_tweets
 
 class TweetProcessor:
-    def __init__(self, scraper: TwitterScraper, tweet_repo: TweetRepository, account_repo: TwitterAccountRepository, category_repo: CategoryRepository, twitter_api:str = 'https://api.vxtwitter.com/Twitter/status/'):
+    """
+    Fetches and stores the scraped tweets. Every account is handled by its own task and every database write
+    runs in its own unit of work, so fetching one account overlaps with storing another.
+    """
+
+    def __init__(self, scraper: TwitterScraper, session_factory: Optional["sessionmaker"] = None, twitter_api:str = 'https://api.vxtwitter.com/Twitter/status/', dedup_config: Optional[DedupConfig] = None, pipeline_config: Optional[PipelineConfig] = None, lock_retries: int = 5, render_config: Optional[RenderConfig] = None, message_cache: Optional[RenderedMessageCache] = None, query_cache: Optional[QueryCache] = None):
         self.scraper = scraper
-        self.tweet_repo = tweet_repo
-        self.account_repo = account_repo
-        self.category_repo = category_repo
+        self.session_factory = session_factory
         self.twitter_api = twitter_api
+        self.dedup_config = dedup_config
+        self.pipeline_config = pipeline_config or PipelineConfig()
+        self.lock_retries = lock_retries
+        self.render_config = render_config or RenderConfig()
+        self.message_cache = message_cache or RenderedMessageCache(self.render_config.cache_size)
+        self.query_cache = query_cache
+        # Fingerprinting reads the buckets written by the previous batch, concurrent batches would miss each other
+        self._dedup_lock = asyncio.Lock()
+
+    async def _run(self, work):
+        return await run_in_unit_of_work(work, self.session_factory, self.dedup_config, attempts=self.lock_retries, query_cache=self.query_cache)
 
-    @async_property
     async def _mapped_account_names_to_categories(self) -> Dict[str, Tuple[int, int]]:
-        return await get_map_ids_to_categories(self.account_repo, self.category_repo)
+        return await self._run(lambda uow: get_map_ids_to_categories(uow.accounts, uow.categories))
+
+    async def _fetch_tweet(self, tweet_id: int, client: "AsyncClient", semaphore: asyncio.Semaphore) -> Optional[FetchedTweet]:
+        async with semaphore:
+            with metrics.FETCH_SECONDS.time():
+                tweet_json = await download_content(url=f"{self.twitter_api}{tweet_id}", client=client)
+        if not tweet_json:
+            metrics.FETCHES.inc(outcome="failure")
+            logger.error("Error fetching tweet %s", tweet_id)
+            return None
+        try:
+            tweet = FetchedTweet.from_vxtwitter(tweet_json)
+        except (KeyError, TypeError) as e:
+            metrics.FETCHES.inc(outcome="failure")
+            logger.error("Malformed response for tweet %s: %s", tweet_id, e)
+            return None
+        metrics.FETCHES.inc(outcome="success")
+        return tweet
+
+    async def _get_tweets(self, found: FoundTweets, client: "AsyncClient", semaphore: asyncio.Semaphore) -> List[FetchedTweet]:
+        results = await asyncio.gather(*(self._fetch_tweet(tweet_id, client, semaphore) for tweet_id in found.ids))
+        return [tweet for tweet in results if tweet]
+
+    async def _insert_tweets(self, tweets: List[FetchedTweet], account_mapping: Dict[str, Tuple[int, int]], stats: Optional[AccountCrawlStats] = None) -> List[StoredTweet]:
+        rows, skipped = tweet_rows(tweets, account_mapping)
+        if skipped and stats is not None:
+            stats.errors += skipped
+        if not rows:
+            logger.info("No tweet rows to insert")
+            return []
 
-    async def _get_tweets(self) -> Dict[str, List[Any]]:
+        async def work(uow: UnitOfWork) -> List[int]:
+            with metrics.DB_INSERT_SECONDS.time():
+                return await uow.tweets.insert_rows(rows)
+
+        try:
+            ids = await self._run(work)
+            metrics.TWEETS_INSERTED.inc(len(ids))
+            logger.info("Inserted %s tweets", len(ids))
+            return [StoredTweet(tweet_id, row) for tweet_id, row in zip(ids, rows)]
+        except Exception as e:
+            logger.error("Error inserting tweets: %s", e)
+            if stats is not None:
+                # None of its tweets were stored, marking the account fresh would skip them next run
+                stats.errors += 1
+                stats.succeeded = False
+            return []
+
+    async def _flag_near_duplicates(self, tweet_objects: List[StoredTweet]):
+        if self.dedup_config is None or not self.dedup_config.enabled or not tweet_objects:
+            return
         try:
-            failed: Dict[str, List[Any]] = defaultdict(list)
-            success: Dict[str, List[Any]] = defaultdict(list)
-            tweets: Dict[str, List[TweetDetails]] = await self.scraper.initial_scrape()
-
-            for account, tweet_list in tweets.items():
-                for tweet in tweet_list:
-                    tweet_url = f"{self.twitter_api}{tweet.id}"
-                    tweet_json = await download_content(url=str(tweet_url))
-                    if not tweet_json:
-                        logger.error(f"Error fetching tweet {tweet.id}")
-                        failed[account].append(tweet.id)
-                        continue
-                    success[account].append(tweet_json)
-            return success
+            async with self._dedup_lock:
+                with metrics.DEDUP_SECONDS.time():
+                    flagged = await self._run(lambda uow: uow.fingerprints.flag_near_duplicates(tweet_objects))
+            metrics.TWEETS_DUPLICATE.inc(flagged)
+            if flagged:
+                logger.info("Flagged %s near-duplicate tweets", flagged)
         except Exception as e:
-            logger.error(f"Error fetching tweets: {str(e)}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-            return {}
+            # The tweets are already stored, a missing fingerprint only means they are never collapsed
+            logger.error("Error flagging near-duplicates: %s", e)
 
-    def _transform_tweet_objects(self, tweets: List[List[Dict]]) -> List[Tweet]:
+    async def _render_messages(self, tweet_objects: List[StoredTweet], account: str, account_mapping: Dict[str, Tuple[int, int]]):
+        if not self.render_config.enabled or not tweet_objects:
+            return
         try:
-            tweet_objects = []
-            for tweet in tweets:
-                account_id, category_id = self._mapped_account_names_to_categories[tweet['user_screen_name']]
-                logger.info(f"Mapping account {account_id} to category {category_id}")
-                dt = parse_date(tweet['date'])
-                tweet_objects.append(Tweet(
-                    twitter_id=str(tweet['tweetID']),
-                    account_id=int(account_id),
-                    category_id=int(category_id),
-                    text=tweet['text'],
-                    media_urls=tweet['mediaURLs'],
-                    created_at=dt
-                ))
-            return tweet_objects
-        except ValidationError as e:
-            logger.error(f"Validation error: {str(e)}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            # Render with the username as stored, like the delivery worker does, not the scraper's lowercased key
+            usernames = {int(account_id): username for username, (account_id, _) in account_mapping.items()}
+            pairs = [(tweet, usernames.get(tweet.account_id, account)) for tweet in tweet_objects]
+            rendered = await self._run(lambda uow: self.message_cache.render(uow.messages, pairs, self.render_config.formats))
+            logger.debug("Rendered %s messages for account %s", rendered, account)
+        except Exception as e:
+            # A missing payload only means it is rendered when it is first needed
+            logger.error("Error rendering messages: %s", e)
 
-    async def _insert_tweets(self, tweets: List[List[Dict]]) -> bool:
+    async def _enqueue_deliveries(self, tweet_objects: List[StoredTweet]):
+        if not tweet_objects:
+            return
         try:
-            tweet_objects: List[Tweet] = self._transform_tweet_objects(tweets)
-            if not tweet_objects:
-                logger.info("No tweet objects to insert")
-                return False
-            await self.tweet_repo.create_all(tweet_objects)
-            logger.info(f"Inserted {len(tweet_objects)} tweets")
-            return True
+            tweet_ids = [tweet.id for tweet in tweet_objects]
+            queued = await self._run(lambda uow: uow.outbox.enqueue_for_tweets(tweet_ids))
+            metrics.OUTBOX_ENQUEUED.inc(queued)
+            logger.debug("Queued %s deliveries", queued)
         except Exception as e:
-            logger.error(f"Error inserting tweets: {str(e)}")
-            await self.tweet_repo.session.rollback()
-            return False
+            # Deliveries are queued again by the next run of `deliver --backfill`
+            logger.error("Error queueing deliveries: %s", e)
+
+    async def _process_account(self, account: str, found: FoundTweets, account_mapping: Dict[str, Tuple[int, int]], client: "AsyncClient", fetch_semaphore: asyncio.Semaphore, account_semaphore: asyncio.Semaphore) -> AccountCrawlStats:
+        stats = self._scraper_stats(account, found)
+        async with account_semaphore:
+            start = time.perf_counter()
+            try:
+                tweets = await self._get_tweets(found, client, fetch_semaphore)
+                stats.tweets_fetched = len(tweets)
+                stats.errors += len(found) - len(tweets)
+                tweet_objects = await self._insert_tweets(tweets, account_mapping, stats) if tweets else []
+                stats.tweets_inserted = len(tweet_objects)
+                if len(found) and not tweet_objects:
+                    # Every fetch failed or every row was skipped, marking the account fresh would drop its tweets
+                    logger.warning("Stored none of the %s tweets found for account %s", len(found), account)
+                    stats.succeeded = False
+                await self._flag_near_duplicates(tweet_objects)
+                await self._render_messages(tweet_objects, account, account_mapping)
+                await self._enqueue_deliveries(tweet_objects)
+            except Exception as e:
+                logger.error("Error processing account %s: %s", account, e, exc_info=True)
+                stats.errors += 1
+                stats.succeeded = False
+            stats.duration_seconds += time.perf_counter() - start
+            return stats
+
+    def _scraper_stats(self, account: str, found: FoundTweets) -> AccountCrawlStats:
+        """The scraper's counts for the account, scrapers that keep none start from what they found"""
+        stats = getattr(self.scraper, "account_stats", {}).get(account)
+        return stats if stats is not None else AccountCrawlStats(username=account, tweets_found=len(found))
+
+    async def _finish_run(self, started_at: datetime, account_stats: List[AccountCrawlStats]):
+        """Mark every account that was crawled without failing as fresh and store the run, in one unit of work"""
+        finished_at = datetime.utcnow()
+        crawled = [stats.username for stats in account_stats if stats.succeeded]
+
+        async def work(uow: UnitOfWork) -> int:
+            await uow.accounts.update_last_fetched_many(crawled)
+            return await uow.crawl_runs.record_run(started_at, finished_at, account_stats)
+
+        try:
+            run_id = await self._run(work)
+            logger.info("Recorded crawl run %s: %s accounts, %s fresh", run_id, len(account_stats), len(crawled))
+        except Exception as e:
+            logger.error("Error recording crawl run: %s", e)
 
     async def process_tweets(self) -> bool:
+        from httpx import AsyncClient
+
+        started_at = datetime.utcnow()
         try:
-            tweets_dict = await self._get_tweets()
+            tweets_dict: Dict[str, FoundTweets] = await self.scraper.initial_scrape()
             if not tweets_dict:
                 logger.info("No tweets to process")
                 return False
-            for account, tweets in tweets_dict.items():
-                await self._insert_tweets(tweets)
-                await self.account_repo.update_last_fetched(account)
+            account_mapping = await self._mapped_account_names_to_categories()
+            fetch_semaphore = asyncio.Semaphore(self.pipeline_config.fetch_concurrency)
+            account_semaphore = asyncio.Semaphore(self.pipeline_config.account_concurrency)
+            # One client for the whole run keeps connections to the API alive between fetches
+            async with AsyncClient(verify=False, timeout=15.0) as client:
+                account_stats = await asyncio.gather(*(
+                    self._process_account(account, found, account_mapping, client, fetch_semaphore, account_semaphore)
+                    for account, found in tweets_dict.items()
+                ))
+            await self._finish_run(started_at, account_stats)
+            if self.query_cache is not None:
+                logger.info("Query cache: %s", self.query_cache.stats())
+            return any(stats.tweets_inserted for stats in account_stats)
         except Exception as e:
-            logger.error(f"Error processing tweets: {str(e)}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            logger.error("Error processing tweets: %s", e, exc_info=True)
             return False
 
-async def main():
-    from src.database.db import get_session
-    from src.database.repositories.repositories import CategoryRepository, TweetRepository, TwitterAccountRepository
+DEFAULT_ACCOUNTS = ["Neovim", "LinusTech", "itpourya", "msc72m", "vim_tricks"]
+
+
+async def main(usernames: Optional[List[str]] = None, days: int = 10, headless: bool = False):
+    from src.database.db import get_session, get_session_factory, init_db
     from src.database.models.pydantic_models import TwitterCredentials
-    from src.core.config import TWITTER_CREDENTIALS
+    from src.core.config import TWITTER_CREDENTIALS, BROWSER_RECYCLE_CONFIG, METRICS_CONFIG, LOGGING_CONFIG, DEDUP_CONFIG, PIPELINE_CONFIG, DB_CONFIG, RENDER_CONFIG, QUERY_CACHE_CONFIG
+    from src.core.logging_config import setup_logging
+
+    setup_logging(LOGGING_CONFIG)
+    metrics.configure_metrics(METRICS_CONFIG.enabled, METRICS_CONFIG.http_port)
 
     try:
-        # Initialize repositories
+        await init_db()
+        # The scraper only reads the known ids, the processor opens a unit of work per write
         logger.info("Initializing session")
         async with get_session() as session:
             logger.info("Initialized session")
             tweet_repo = TweetRepository(Tweet, session)
-            account_repo = TwitterAccountRepository(TwitterAccountRepository, session)
-            category_repo = CategoryRepository(CategoryRepository, session)
-            # having troble storing the account names as dict keys and tweets as list  infront of it
 
             # Initialize Twitter scraper
             auth = TwitterAuth(TwitterCredentials(**TWITTER_CREDENTIALS.model_dump()))
-            # "Neovim", "LinusTech", "itpourya", "msc72m"
-            scraper = TwitterScraper(auth, tweet_repo, ["Neovim", "LinusTech", "itpourya", "msc72m", "vim_tricks"], 10, headless=False)
-            processor = TweetProcessor(scraper, tweet_repo, account_repo, category_repo)
+            scraper = TwitterScraper(auth, tweet_repo, usernames or DEFAULT_ACCOUNTS, days, headless=headless, recycle_config=BROWSER_RECYCLE_CONFIG)
+            processor = TweetProcessor(
+                scraper, get_session_factory(), dedup_config=DEDUP_CONFIG,
+                pipeline_config=PIPELINE_CONFIG, lock_retries=DB_CONFIG.lock_retries, render_config=RENDER_CONFIG,
+                query_cache=QueryCache(QUERY_CACHE_CONFIG.max_entries, QUERY_CACHE_CONFIG.ttl_seconds) if QUERY_CACHE_CONFIG.enabled else None
+            )
             # Process tweets
             await processor.process_tweets()
             return None
 
     except Exception as e:
-        logger.error(f"Error: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        logger.error("Error: %s", e, exc_info=True)
+    finally:
+        if METRICS_CONFIG.enabled and METRICS_CONFIG.dump_path:
+            metrics.REGISTRY.dump(METRICS_CONFIG.dump_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from src.database.models.pydantic_models import ExportResult
+
+if TYPE_CHECKING:
+    from src.database.repositories.repositories import TweetRepository, ExportMarkerRepository
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ["id", "twitter_id", "text", "created_at", "media_urls", "username", "category"]
+
+
+class JsonlWriter:
+    """One JSON object per line, gzip compressed when the path ends with .gz"""
+
+    def __init__(self, path: str):
+        self._file = gzip.open(path, "wt", encoding="utf-8") if path.endswith(".gz") else open(path, "w", encoding="utf-8")
+
+    def write_batch(self, rows: List[Dict[str, Any]]):
+        lines = []
+        for row in rows:
+            created_at = row["created_at"]
+            row["created_at"] = created_at.isoformat() if created_at else None
+            lines.append(json.dumps(row, ensure_ascii=False))
+        lines.append("")
+        self._file.write("\n".join(lines))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Columnar output through pyarrow, every batch becomes a row group"""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow, install it with `pip install pyarrow`") from e
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("twitter_id", pa.string()),
+            ("text", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("media_urls", pa.list_(pa.string())),
+            ("username", pa.string()),
+            ("category", pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write_batch(self, rows: List[Dict[str, Any]]):
+        columns = {name: [row[name] for row in rows] for name in EXPORT_COLUMNS}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+async def export_tweets(
+        tweet_repo: "TweetRepository",
+        path: str,
+        format: str = "jsonl",
+        category: Optional[Union[int, str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        marker_repo: Optional["ExportMarkerRepository"] = None,
+        marker: Optional[str] = None,
+        batch_size: int = 5000
+) -> ExportResult:
+    """
+    Stream tweets into `path` in bounded batches. With a marker, only tweets newer than the previous
+    run of that marker are written and the marker moves forward once the file is complete.
+    The file is written to a hidden sibling of `path` and renamed at the end, so a failed run never leaves a partial export.
+    """
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format: {format}")
+
+    after_id = None
+    if marker:
+        after_id = await marker_repo.get_last_tweet_id(marker)
+        logger.info("Exporting tweets after ID %s for marker %s", after_id, marker)
+
+    start = time.perf_counter()
+    directory, filename = os.path.split(path)
+    partial_path = os.path.join(directory, f".partial-{filename}")
+    writer = WRITERS[format](partial_path)
+    rows = 0
+    last_tweet_id = after_id
+    try:
+        async for batch in tweet_repo.iter_export_rows(category, since, until, after_id, batch_size):
+            last_tweet_id = batch[-1]["id"]
+            writer.write_batch(batch)
+            rows += len(batch)
+            logger.debug("Exported %s tweets so far", rows)
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(partial_path)
+        raise
+    os.replace(partial_path, path)
+
+    if marker and last_tweet_id is not None and last_tweet_id != after_id:
+        await marker_repo.set_last_tweet_id(marker, last_tweet_id)
+
+    elapsed = time.perf_counter() - start
+    logger.info("Exported %s tweets to %s in %.1fs", rows, path, elapsed)
+    return ExportResult(path=path, format=format, rows=rows, last_tweet_id=last_tweet_id, elapsed_seconds=round(elapsed, 3))
@@ -0,0 +1,48 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional
+
+from src.database.models.pydantic_models import RetentionConfig, RetentionResult
+
+if TYPE_CHECKING:
+    from src.database.repositories.repositories import RetentionRepository, DatabaseStatsRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def run_retention(
+        retention_repo: "RetentionRepository",
+        config: RetentionConfig,
+        stats_repo: Optional["DatabaseStatsRepository"] = None,
+        now: Optional[datetime] = None
+) -> RetentionResult:
+    """
+    Archive every tweet older than config.hot_days, one committed batch at a time so a crawl
+    running at the same time is only ever blocked for a single batch, then vacuum and analyze.
+    """
+    start = time.perf_counter()
+    cutoff = (now or datetime.utcnow()) - timedelta(days=config.hot_days)
+    size_before = await stats_repo.get_database_size() if stats_repo else None
+
+    tweets_archived = deliveries_archived = batches = 0
+    while True:
+        tweets, deliveries = await retention_repo.archive_batch(cutoff, config.batch_size)
+        if not tweets:
+            break
+        tweets_archived += tweets
+        deliveries_archived += deliveries
+        batches += 1
+        logger.info("Archived %s tweets so far", tweets_archived)
+
+    if config.vacuum and tweets_archived:
+        logger.info("Vacuuming the database")
+        await retention_repo.vacuum()
+
+    size_after = await stats_repo.get_database_size() if stats_repo else None
+    elapsed = time.perf_counter() - start
+    logger.info("Archived %s tweets and %s deliveries older than %s", tweets_archived, deliveries_archived, cutoff)
+    return RetentionResult(
+        cutoff=cutoff, tweets_archived=tweets_archived, deliveries_archived=deliveries_archived, batches=batches,
+        size_before=size_before, size_after=size_after, elapsed_seconds=round(elapsed, 3)
+    )
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Protocol
+
+from src.database.models.pydantic_models import DeliveryConfig, DeliveryJob
+from src.database.unit_of_work import run_in_unit_of_work
+from src.services.telegram.render import Payload, RenderedMessageCache
+from src.utils import metrics
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class Sender(Protocol):
+    async def send(self, telegram_id: int, payload: Payload) -> None:
+        """Send one rendered payload, raise when Telegram did not accept it"""
+
+
+class TelegramBotSender:
+    """Sends rendered payloads through the Bot API, the payload names the method it is meant for"""
+
+    def __init__(self, token: str, client: "AsyncClient"):
+        self._base_url = f"https://api.telegram.org/bot{token}"
+        self._client = client
+
+    async def send(self, telegram_id: int, payload: Payload) -> None:
+        body: Dict[str, Any] = {key: value for key, value in payload.items() if key != "method"}
+        body["chat_id"] = telegram_id
+        response = await self._client.post(f"{self._base_url}/{payload['method']}", json=body)
+        data = response.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"Telegram refused {payload['method']}: {data.get('description', response.status_code)}")
+
+
+class DeliveryWorker:
+    """
+    Drains the delivery outbox: claims a batch under a lease, sends it concurrently and acknowledges every
+    success in a single transaction. Failed jobs go back to the queue after a delay until their attempts
+    are used up, then they stay in the outbox as dead letters. A job whose send succeeded but whose
+    acknowledgement was lost is sent again once its lease runs out, so a subscriber may see a message
+    twice but never misses one.
+    """
+
+    def __init__(self, sender: Sender, session_factory: Optional["sessionmaker"] = None, message_cache: Optional[RenderedMessageCache] = None, config: Optional[DeliveryConfig] = None):
+        self.sender = sender
+        self.session_factory = session_factory
+        self.config = config or DeliveryConfig()
+        self.message_cache = message_cache or RenderedMessageCache()
+
+    async def _payloads(self, jobs: List[DeliveryJob]) -> Dict[int, Payload]:
+        tweet_ids = list({job.tweet_id for job in jobs})
+
+        async def load(uow):
+            payloads = await self.message_cache.get_many(uow.messages, tweet_ids, self.config.format)
+            missing = [tweet_id for tweet_id in tweet_ids if tweet_id not in payloads]
+            if missing:
+                # Rendered at insert time normally, this covers older tweets and disabled or bumped formats
+                await self.message_cache.render(uow.messages, await uow.tweets.get_many_with_usernames(missing), [self.config.format])
+                payloads.update(await self.message_cache.get_many(uow.messages, missing, self.config.format))
+            return payloads
+
+        return await run_in_unit_of_work(load, self.session_factory)
+
+    async def _send(self, job: DeliveryJob, payload: Optional[Payload], semaphore: asyncio.Semaphore) -> Optional[str]:
+        """Returns None once the message is sent, the error otherwise"""
+        if payload is None:
+            metrics.DELIVERY_SENDS.inc(outcome="missing")
+            return "Tweet no longer exists"
+        async with semaphore:
+            try:
+                with metrics.DELIVERY_SEND_SECONDS.time():
+                    await self.sender.send(job.telegram_id, payload)
+                metrics.DELIVERY_SENDS.inc(outcome="sent")
+                return None
+            except Exception as e:
+                metrics.DELIVERY_SENDS.inc(outcome="failed")
+                logger.warning("Sending tweet %s to %s failed (attempt %s): %s", job.tweet_id, job.telegram_id, job.attempts, e)
+                return str(e)[:500]
+
+    async def run_once(self) -> int:
+        """Deliver one batch, returns how many jobs were claimed"""
+        token, jobs = await run_in_unit_of_work(
+            lambda uow: uow.outbox.claim_batch(self.config.batch_size, self.config.lease_seconds, self.config.max_attempts),
+            self.session_factory
+        )
+        if not jobs:
+            return 0
+
+        payloads = await self._payloads(jobs)
+        semaphore = asyncio.Semaphore(self.config.send_concurrency)
+        errors = await asyncio.gather(*(self._send(job, payloads.get(job.tweet_id), semaphore) for job in jobs))
+
+        sent = [job.id for job, error in zip(jobs, errors) if error is None]
+        failed: Dict[str, List[int]] = {}
+        for job, error in zip(jobs, errors):
+            if error is not None:
+                failed.setdefault(error, []).append(job.id)
+
+        async def settle(uow) -> int:
+            acked = await uow.outbox.ack(sent, token)
+            for error, job_ids in failed.items():
+                await uow.outbox.release(job_ids, token, error, self.config.retry_delay_seconds, self.config.max_attempts)
+            return acked
+
+        acked = await run_in_unit_of_work(settle, self.session_factory)
+        if acked < len(sent):
+            logger.warning("Lease %s ran out before %s sent messages were acknowledged, another worker owns them now", token, len(sent) - acked)
+        logger.info("Delivered %s of %s messages", len(sent), len(jobs))
+        return len(jobs)
+
+    async def run(self, once: bool = False):
+        """Keep draining the outbox, sleeping while it is empty. With `once` stop as soon as it is"""
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error("Error delivering messages: %s", e, exc_info=True)
+                claimed = 0
+                if once:
+                    raise
+            if not claimed:
+                if once:
+                    return
+                await asyncio.sleep(self.config.idle_seconds)
@@ -0,0 +1,160 @@
+import html
+import logging
+import re
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.utils import metrics
+
+if TYPE_CHECKING:
+    from src.database.models.models import Tweet
+    from src.database.repositories.repositories import RenderedMessageRepository
+
+logger = logging.getLogger(__name__)
+
+# Bump a version whenever its renderer output changes, older cached payloads are then ignored and re-rendered
+FORMAT_VERSIONS: Dict[str, int] = {"html": 1, "plain": 1}
+
+# Telegram Bot API limits
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+MEDIA_GROUP_LIMIT = 10
+
+_TCO_LINK = re.compile(r'\s*https://t\.co/\w+\s*$')
+_VIDEO_EXTENSIONS = (".mp4", ".mov", ".webm")
+
+Payload = Dict[str, Any]
+
+
+def _media_items(media_urls: Optional[List[str]]) -> List[Dict[str, str]]:
+    items = []
+    for url in (media_urls or [])[:MEDIA_GROUP_LIMIT]:
+        kind = "video" if urlsplit(url).path.lower().endswith(_VIDEO_EXTENSIONS) else "photo"
+        items.append({"type": kind, "media": url})
+    return items
+
+
+def _compose(header: str, body: str, footer: str, limit: int, escape: Callable[[str], str]) -> str:
+    """Join the parts, shortening the raw body before escaping so markup and entities are never cut in half"""
+    room = limit - len(header) - len(footer)
+    escaped = escape(body)
+    if len(escaped) > room:
+        # Longest raw prefix whose escaped form still fits next to the ellipsis
+        low, high = 0, len(body)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if len(escape(body[:middle])) < room:
+                low = middle
+            else:
+                high = middle - 1
+        escaped = escape(body[:low]) + "…"
+    return header + escaped + footer
+
+
+def _clean_text(text: Optional[str], has_media: bool) -> str:
+    text = text or ""
+    # The trailing t.co link of a tweet with media points at the media itself, which is attached instead
+    return _TCO_LINK.sub("", text) if has_media else text
+
+
+def _payload(text: str, media: List[Dict[str, str]], parse_mode: Optional[str]) -> Payload:
+    """Pick the Bot API method for the message, the caption goes on the first media item of a group"""
+    if not media:
+        payload = {"method": "sendMessage", "text": text, "disable_web_page_preview": True}
+    elif len(media) == 1:
+        kind = media[0]["type"]
+        payload = {"method": f"send{kind.title()}", kind: media[0]["media"], "caption": text}
+    else:
+        first = dict(media[0], caption=text)
+        if parse_mode:
+            first["parse_mode"] = parse_mode
+        payload = {"method": "sendMediaGroup", "media": [first] + media[1:]}
+    if parse_mode and payload["method"] != "sendMediaGroup":
+        payload["parse_mode"] = parse_mode
+    return payload
+
+
+def render_html(tweet: "Tweet", username: str) -> Payload:
+    media = _media_items(tweet.media_urls)
+    link = f"https://twitter.com/{username}/status/{tweet.twitter_id}"
+    text = _compose(
+        f"<b>@{html.escape(username)}</b>\n\n",
+        _clean_text(tweet.text, bool(media)),
+        f'\n\n<a href="{html.escape(link, quote=True)}">Open on Twitter</a>',
+        CAPTION_LIMIT if media else MESSAGE_LIMIT,
+        html.escape
+    )
+    return _payload(text, media, "HTML")
+
+
+def render_plain(tweet: "Tweet", username: str) -> Payload:
+    media = _media_items(tweet.media_urls)
+    text = _compose(
+        f"@{username}\n\n",
+        _clean_text(tweet.text, bool(media)),
+        f"\n\nhttps://twitter.com/{username}/status/{tweet.twitter_id}",
+        CAPTION_LIMIT if media else MESSAGE_LIMIT,
+        lambda text: text
+    )
+    return _payload(text, media, None)
+
+
+RENDERERS: Dict[str, Callable[["Tweet", str], Payload]] = {"html": render_html, "plain": render_plain}
+
+
+class RenderedMessageCache:
+    """
+    Rendered payloads keyed by (tweet id, format, version). Lookups go to an in-process LRU first and the
+    rendered_messages table second, so fanning a tweet out to many subscribers never renders it again.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[int, str, int], Payload]" = OrderedDict()
+
+    def _remember(self, key: Tuple[int, str, int], payload: Payload):
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    async def render(self, repo: "RenderedMessageRepository", tweets: Iterable[Tuple["Tweet", str]], formats: Iterable[str]) -> int:
+        """Render (tweet, username) pairs in every format, store them and keep them warm, returns payloads rendered"""
+        rows = []
+        with metrics.RENDER_SECONDS.time():
+            for tweet, username in tweets:
+                for format in formats:
+                    version = FORMAT_VERSIONS[format]
+                    payload = RENDERERS[format](tweet, username)
+                    rows.append({"tweet_id": tweet.id, "format": format, "version": version, "payload": payload})
+                    self._remember((tweet.id, format, version), payload)
+        if rows:
+            await repo.save_many(rows)
+        return len(rows)
+
+    async def get_many(self, repo: "RenderedMessageRepository", tweet_ids: Iterable[int], format: str = "html") -> Dict[int, Payload]:
+        """Payloads of the given tweets, tweets that were never rendered in this format version are missing from the result"""
+        version = FORMAT_VERSIONS[format]
+        found: Dict[int, Payload] = {}
+        missing = []
+        for tweet_id in tweet_ids:
+            payload = self._entries.get((tweet_id, format, version))
+            if payload is None:
+                missing.append(tweet_id)
+                continue
+            self._entries.move_to_end((tweet_id, format, version))
+            found[tweet_id] = payload
+        metrics.RENDER_CACHE_LOOKUPS.inc(len(found), outcome="memory")
+
+        if missing:
+            stored = await repo.get_many(missing, format, version)
+            for tweet_id, payload in stored.items():
+                self._remember((tweet_id, format, version), payload)
+            found.update(stored)
+            metrics.RENDER_CACHE_LOOKUPS.inc(len(stored), outcome="database")
+            metrics.RENDER_CACHE_LOOKUPS.inc(len(missing) - len(stored), outcome="miss")
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "capacity": self.capacity}
@@ -0,0 +1,254 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelValues:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class _NullTimer:
+    """Timer handed out while metrics are disabled, it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not self._registry.enabled:
+            return
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+    def reset(self):
+        self._values = {}
+
+
+class Histogram:
+    """Latency histogram with fixed cumulative buckets, optionally split by labels"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        # render runs in the HTTP server thread, it must never see the counts of a label set without its sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not self._registry.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[bisect_left(self.buckets, value)] += 1
+            self._sums[key] += value
+
+    def time(self, **labels):
+        """Context manager observing the wall time of the wrapped block"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile by interpolating inside the matching bucket, like histogram_quantile"""
+        counts = self._counts.get(_label_key(labels))
+        if not counts:
+            return None
+        total = sum(counts)
+        rank = q * total
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * ((rank - cumulative) / bucket_count)
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items()]
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', repr(bound)))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+            self._sums = {}
+
+
+class MetricsRegistry:
+    """Holds all metrics and exposes them in the Prometheus text format"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(self, name, documentation)
+        return self._metrics[name]
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(self, name, documentation, buckets)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def dump(self, path: str):
+        with open(path, "w") as file:
+            file.write(self.render())
+        logger.info("Dumped metrics to %s", path)
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1"):
+        """Serve the metrics on /metrics from a daemon thread"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+
+    def stop_http_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+REGISTRY = MetricsRegistry()
+
+# Crawl stages
+AUTH_SECONDS = REGISTRY.histogram("crawler_auth_seconds", "Time spent checking and performing Twitter login")
+AUTH_FAILURES = REGISTRY.counter("crawler_auth_failures_total", "Failed Twitter login attempts")
+NAVIGATION_SECONDS = REGISTRY.histogram("crawler_navigation_seconds", "Time to load a search page")
+EXTRACTION_SECONDS = REGISTRY.histogram("crawler_extraction_seconds", "Time to extract tweets from the page after a scroll")
+SCROLLS = REGISTRY.counter("crawler_scrolls_total", "Scrolls performed on search pages")
+TWEETS_FOUND = REGISTRY.counter("crawler_tweets_found_total", "New tweet ids found on search pages")
+
+# Fetch and storage stages
+FETCH_SECONDS = REGISTRY.histogram("vxtwitter_fetch_seconds", "Latency of tweet fetches from the vxtwitter API")
+FETCHES = REGISTRY.counter("vxtwitter_fetches_total", "Tweet fetches from the vxtwitter API by outcome")
+DB_INSERT_SECONDS = REGISTRY.histogram("db_insert_batch_seconds", "Time to insert a batch of tweets")
+TWEETS_INSERTED = REGISTRY.counter("db_tweets_inserted_total", "Tweets inserted into the database")
+DEDUP_SECONDS = REGISTRY.histogram("dedup_batch_seconds", "Time to fingerprint a batch of inserted tweets and flag near-duplicates")
+TWEETS_DUPLICATE = REGISTRY.counter("dedup_tweets_flagged_total", "Inserted tweets flagged as near-duplicates")
+
+# Delivery stage
+RENDER_SECONDS = REGISTRY.histogram("render_batch_seconds", "Time to render the Telegram payloads of a batch of inserted tweets")
+RENDER_CACHE_LOOKUPS = REGISTRY.counter("render_cache_lookups_total", "Rendered payload lookups by where they were found")
+DELIVERY_SEND_SECONDS = REGISTRY.histogram("delivery_send_seconds", "Time to send a message to a subscriber")
+DELIVERY_SENDS = REGISTRY.counter("delivery_sends_total", "Messages sent to subscribers by outcome")
+OUTBOX_ENQUEUED = REGISTRY.counter("outbox_enqueued_total", "Delivery jobs added to the outbox")
+QUERY_CACHE_LOOKUPS = REGISTRY.counter("query_cache_lookups_total", "Cached repository lookups by outcome and method")
+
+
+def configure_metrics(enabled: bool, http_port: Optional[int] = None) -> MetricsRegistry:
+    REGISTRY.enabled = enabled
+    if enabled and http_port:
+        REGISTRY.start_http_server(http_port)
+    return REGISTRY
@@ -0,0 +1,90 @@
+import hashlib
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
+
+_URL = re.compile(r'https?://\S+')
+_MENTION = re.compile(r'(^|\s)(rt\s+)?@\w+:?')
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+FINGERPRINT_BITS = 64
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+# Media buckets live above every simhash band bucket so the two kinds never collide
+MEDIA_BUCKET_FLAG = 1 << 62
+
+# Two bands of 32 bits at the least, so band buckets stay far below MEDIA_BUCKET_FLAG and fit a signed
+# BIGINT, and eight bands of 8 bits at the most, narrower bands put every tweet into the same few buckets
+MIN_BAND_DISTANCE = 1
+MAX_BAND_DISTANCE = 7
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def to_signed(value: int) -> int:
+    """Fit an unsigned 64 bit fingerprint into a signed BIGINT column"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & _MASK
+
+
+def normalize_tokens(text: Optional[str]) -> List[str]:
+    """Lowercase words of a tweet without links, mentions and retweet prefixes, which differ between cross-posts"""
+    if not text:
+        return []
+    text = _URL.sub(" ", text.lower())
+    text = _MENTION.sub(" ", text)
+    return _TOKEN.findall(text)
+
+
+def simhash(tokens: List[str]) -> int:
+    """64 bit SimHash over word unigrams and bigrams, similar texts differ in only a few bits"""
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        value = _hash64(feature)
+        for bit in range(FINGERPRINT_BITS):
+            if value >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def media_fingerprint(media_urls: Optional[Iterable[str]]) -> Optional[int]:
+    """Hash of the attached media, ignoring the size and format query strings Twitter appends"""
+    if not media_urls:
+        return None
+    paths = sorted(urlsplit(url).path for url in media_urls if url)
+    if not paths:
+        return None
+    return _hash64("\n".join(paths))
+
+
+def band_buckets(fingerprint: int, max_distance: int) -> List[int]:
+    """
+    Split the fingerprint into max_distance + 1 bands, fingerprints within max_distance bits
+    of each other agree on at least one band, so only tweets sharing a bucket need comparing
+    """
+    if not MIN_BAND_DISTANCE <= max_distance <= MAX_BAND_DISTANCE:
+        raise ValueError(f"max_distance must be between {MIN_BAND_DISTANCE} and {MAX_BAND_DISTANCE}, got {max_distance}")
+    bands = max_distance + 1
+    width = FINGERPRINT_BITS // bands
+    mask = (1 << width) - 1
+    return [(band << width) | (fingerprint >> (band * width) & mask) for band in range(bands)]
+
+
+def media_bucket(fingerprint: int) -> int:
+    return MEDIA_BUCKET_FLAG | (fingerprint & (MEDIA_BUCKET_FLAG - 1))
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    Run `work(session_factory)` against a fresh SQLite database with every table and the search index,
+    the tests drive it with asyncio.run so they need no async plugin
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    from src.database.base import Base
+    from src.database.db import build_engine
+    from src.database.models.pydantic_models import DBConfig
+    import src.database.models.models  # noqa: F401
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.sqlite3'}"
+
+    def run(work):
+        async def main():
+            engine = build_engine(DBConfig(db_url=url))
+            session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                return await work(session_factory)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+
+    return run
+
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from src.database.models.models import Tweet, TweetFingerprint
+from src.database.models.pydantic_models import DedupConfig
+from src.database.repositories.repositories import RetentionRepository, TweetFingerprintRepository, TweetRepository
+from src.services.crawler.records import StoredTweet
+
+TEXT = "Neovim 0.11 ships a built-in LSP client with faster startup and better completion"
+OTHER = "Linus Tech Tips reviews the new graphics card lineup and benchmarks every model in four games"
+PHOTO = ["https://pbs.twimg.com/media/abc.jpg"]
+
+
+def _row(twitter_id, text, media_urls=None, days_ago=0):
+    return {
+        "twitter_id": str(twitter_id), "account_id": 1, "category_id": 1, "text": text,
+        "media_urls": media_urls or [], "created_at": datetime(2026, 1, 10) - timedelta(days=days_ago)
+    }
+
+
+async def _insert_and_flag(session, rows):
+    ids = await TweetRepository(Tweet, session).insert_rows(rows)
+    tweets = [StoredTweet(tweet_id, row) for tweet_id, row in zip(ids, rows)]
+    flagged = await TweetFingerprintRepository(TweetFingerprint, session, DedupConfig()).flag_near_duplicates(tweets)
+    return ids, flagged
+
+
+def test_reposted_text_is_flagged(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            ids, _ = await _insert_and_flag(session, [_row(1, TEXT)])
+            repost_ids, flagged = await _insert_and_flag(session, [_row(2, f"RT @neovim: {TEXT}")])
+            duplicates = await TweetFingerprintRepository(TweetFingerprint, session).get_duplicate_ids(repost_ids)
+            return flagged, duplicates, ids[0], repost_ids[0]
+
+    flagged, duplicates, original, repost = database(work)
+    assert flagged == 1
+    assert duplicates == {repost: original}
+
+
+def test_shared_media_under_different_texts_is_not_flagged(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            await _insert_and_flag(session, [_row(1, TEXT, PHOTO)])
+            _, flagged = await _insert_and_flag(session, [_row(2, OTHER, PHOTO)])
+            return flagged
+
+    assert database(work) == 0
+
+
+def test_shared_media_without_text_is_flagged(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            await _insert_and_flag(session, [_row(1, "wow", PHOTO)])
+            _, flagged = await _insert_and_flag(session, [_row(2, None, PHOTO)])
+            return flagged
+
+    assert database(work) == 1
+
+
+def test_repost_of_an_archived_tweet_is_flagged(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            ids, _ = await _insert_and_flag(session, [_row(1, TEXT, days_ago=60), _row(2, OTHER, days_ago=1)])
+            archived, _ = await RetentionRepository(session).archive_batch(datetime(2026, 1, 10) - timedelta(days=30))
+            still_hot = await TweetRepository(Tweet, session).tweet_exists("1")
+            repost_ids, flagged = await _insert_and_flag(session, [_row(3, f"RT @neovim: {TEXT}")])
+            duplicates = await TweetFingerprintRepository(TweetFingerprint, session).get_duplicate_ids(repost_ids)
+            return archived, still_hot, flagged, duplicates, ids[0], repost_ids[0]
+
+    archived, still_hot, flagged, duplicates, original, repost = database(work)
+    assert archived == 1 and not still_hot
+    assert flagged == 1
+    assert duplicates == {repost: original}
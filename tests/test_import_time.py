@@ -0,0 +1,8 @@
+from src.benchmarks import importtime
+
+
+def test_entry_points_stay_within_import_budget():
+    # Every entry point is imported in fresh interpreters and the best run counts, budgets are scaled
+    # by how fast this machine imports the reference module so a busy CI runner does not fail them
+    failures = importtime.check(runs=5)
+    assert not failures, "\n".join(failures)
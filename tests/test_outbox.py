@@ -0,0 +1,160 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+
+from src.database.models.models import (
+    Category, DeliveredTweet, OutboxJob, Tweet, TweetFingerprint, TwitterAccount, User,
+    user_account_subscriptions, user_category_subscriptions
+)
+from src.database.models.pydantic_models import DedupConfig
+from src.database.repositories.repositories import OutboxRepository, TweetFingerprintRepository, TweetRepository
+from src.services.crawler.records import StoredTweet
+
+TEXT = "Neovim 0.11 ships a built-in LSP client with faster startup and better completion"
+
+
+async def _seed(session, accounts=("neovim", "reposter")):
+    """One category, the given accounts in it, returns their ids"""
+    session.add(Category(id=1, name="tech", is_active=True))
+    session.add_all([TwitterAccount(id=index, username=username) for index, username in enumerate(accounts, 1)])
+    await session.commit()
+    return list(range(1, len(accounts) + 1))
+
+
+async def _user(session, telegram_id, accounts=(), categories=()):
+    user = User(id=uuid4(), telegram_id=telegram_id)
+    session.add(user)
+    await session.flush()
+    if accounts:
+        await session.execute(insert(user_account_subscriptions), [{"user_id": user.id, "account_id": account} for account in accounts])
+    if categories:
+        await session.execute(insert(user_category_subscriptions), [{"user_id": user.id, "category_id": category} for category in categories])
+    await session.commit()
+    return user.id
+
+
+async def _insert(session, rows):
+    ids = await TweetRepository(Tweet, session).insert_rows(rows)
+    tweets = [StoredTweet(tweet_id, row) for tweet_id, row in zip(ids, rows)]
+    await TweetFingerprintRepository(TweetFingerprint, session, DedupConfig()).flag_near_duplicates(tweets)
+    return ids
+
+
+def _row(twitter_id, account_id, text):
+    return {"twitter_id": str(twitter_id), "account_id": account_id, "category_id": 1, "text": text, "media_urls": [], "created_at": datetime(2026, 1, 1)}
+
+
+async def _queued(session):
+    result = await session.execute(select(User.telegram_id, OutboxJob.tweet_id).join(User, User.id == OutboxJob.user_id))
+    return sorted(result.all())
+
+
+def test_duplicate_is_queued_for_users_who_never_get_its_original(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            neovim, reposter = await _seed(session)
+            await _user(session, 1, accounts=[neovim])
+            await _user(session, 2, accounts=[reposter])
+            await _user(session, 3, categories=[1])
+            # Original and repost in one batch, queued by a single enqueue
+            original, repost = await _insert(session, [_row(1, neovim, TEXT), _row(2, reposter, f"RT @neovim: {TEXT}")])
+            await OutboxRepository(OutboxJob, session).enqueue_for_tweets([original, repost])
+            return original, repost, await _queued(session)
+
+    original, repost, queued = database(work)
+    # The follower of the reposting account gets the repost, the category subscriber only the original
+    assert queued == [(1, original), (2, repost), (3, original)]
+
+
+def test_duplicate_is_skipped_once_its_original_was_delivered(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            neovim, reposter = await _seed(session)
+            both = await _user(session, 1, accounts=[neovim, reposter])
+            await _user(session, 2, accounts=[reposter])
+            (original,) = await _insert(session, [_row(1, neovim, TEXT)])
+            session.add(DeliveredTweet(user_id=both, tweet_id=original))
+            await session.commit()
+            (repost,) = await _insert(session, [_row(2, reposter, f"RT @neovim: {TEXT}")])
+            await OutboxRepository(OutboxJob, session).enqueue_backlog()
+            return repost, await _queued(session)
+
+    repost, queued = database(work)
+    assert queued == [(2, repost)]
+
+
+async def _one_job(session):
+    """A single queued delivery of one tweet to one user"""
+    neovim, _ = await _seed(session)
+    await _user(session, 1, accounts=[neovim])
+    await _insert(session, [_row(1, neovim, TEXT)])
+    outbox = OutboxRepository(OutboxJob, session)
+    assert await outbox.enqueue_backlog() == 1
+    return outbox
+
+
+async def _delivered(session):
+    return (await session.execute(select(DeliveredTweet.tweet_id))).scalars().all()
+
+
+def test_expired_lease_is_claimed_again_and_only_the_new_holder_can_ack(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            outbox = await _one_job(session)
+            stale_token, jobs = await outbox.claim_batch(lease_seconds=0)
+            first = [(job.id, job.attempts) for job in jobs]
+            token, jobs = await outbox.claim_batch(lease_seconds=60)
+            second = [(job.id, job.attempts) for job in jobs]
+            held = (await outbox.claim_batch())[1]
+            stale_ack = await outbox.ack([job_id for job_id, _ in second], stale_token)
+            ack = await outbox.ack([job_id for job_id, _ in second], token)
+            repeated_ack = await outbox.ack([job_id for job_id, _ in second], token)
+            return first, second, held, stale_ack, ack, repeated_ack, await _delivered(session), await _queued(session)
+
+    first, second, held, stale_ack, ack, repeated_ack, delivered, queued = database(work)
+    assert [attempts for _, attempts in first] == [1]
+    assert [job_id for job_id, _ in second] == [job_id for job_id, _ in first]
+    assert [attempts for _, attempts in second] == [2]
+    # A job under a live lease is not handed out twice
+    assert held == []
+    assert (stale_ack, ack, repeated_ack) == (0, 1, 0)
+    assert delivered == [1]
+    assert queued == []
+
+
+def test_failed_jobs_become_dead_letters_and_can_be_requeued(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            outbox = await _one_job(session)
+            for _ in range(2):
+                token, jobs = await outbox.claim_batch(max_attempts=2)
+                await outbox.release([job.id for job in jobs], token, "Forbidden: bot was blocked by the user", retry_delay_seconds=0, max_attempts=2)
+            exhausted = (await outbox.claim_batch(max_attempts=2))[1]
+            backlog = await outbox.get_backlog()
+            requeued = await outbox.requeue_failed()
+            token, jobs = await outbox.claim_batch(max_attempts=2)
+            return exhausted, backlog, requeued, jobs
+
+    exhausted, backlog, requeued, jobs = database(work)
+    assert exhausted == []
+    assert [(entry.pending, entry.failed) for entry in backlog] == [(0, 1)]
+    assert requeued == 1
+    assert [job.attempts for job in jobs] == [1]
+
+
+def test_lease_expiring_on_the_final_attempt_dead_letters_the_job(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            outbox = await _one_job(session)
+            # The worker dies during its only attempt and never releases the job
+            await outbox.claim_batch(lease_seconds=0, max_attempts=1)
+            reclaimed = (await outbox.claim_batch(max_attempts=1))[1]
+            job = (await session.execute(select(OutboxJob))).scalars().one()
+            return reclaimed, job.failed_at, job.last_error, job.lease_token
+
+    reclaimed, failed_at, last_error, lease_token = database(work)
+    assert reclaimed == []
+    assert failed_at is not None
+    assert last_error == "Lease expired on the final attempt"
+    assert lease_token is None
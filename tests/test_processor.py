@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from src.database.models.models import Category, TwitterAccount, twitter_account_categories
+from src.database.models.pydantic_models import RenderConfig
+from src.services.crawler.records import FetchedTweet, FoundTweets
+from src.services.crawler.twitter import TweetProcessor
+
+DATE = "Wed Oct 10 20:19:24 +0000 2018"
+
+
+class _Scraper:
+    """Keeps no per-account stats, the processor starts from what was found"""
+
+
+def _found(*tweet_ids):
+    found = FoundTweets()
+    found.extend([(tweet_id, 0) for tweet_id in tweet_ids])
+    return found
+
+
+async def _run_accounts(session_factory, responses, found_by_account):
+    """Process the accounts with canned vxtwitter results, then finish the run, returns every account's last_fetched"""
+    async with session_factory() as session:
+        session.add(Category(id=1, name="tech", description="Tech", is_active=True))
+        session.add_all([TwitterAccount(id=index, username=username) for index, username in enumerate(found_by_account, 1)])
+        await session.flush()
+        await session.execute(insert(twitter_account_categories), [
+            {"twitter_account_id": index, "category_id": 1} for index in range(1, len(found_by_account) + 1)
+        ])
+        await session.commit()
+
+    processor = TweetProcessor(_Scraper(), session_factory, render_config=RenderConfig(enabled=False))
+
+    async def fetch(tweet_id, client, semaphore):
+        return responses.get(tweet_id)
+
+    processor._fetch_tweet = fetch
+    mapping = await processor._mapped_account_names_to_categories()
+    semaphore = asyncio.Semaphore(4)
+    stats = [
+        await processor._process_account(account, found, mapping, None, semaphore, semaphore)
+        for account, found in found_by_account.items()
+    ]
+    await processor._finish_run(datetime.utcnow(), stats)
+    async with session_factory() as session:
+        fetched = dict((await session.execute(select(TwitterAccount.username, TwitterAccount.last_fetched))).all())
+    return {entry.username: entry for entry in stats}, fetched
+
+
+def test_account_whose_tweets_all_failed_stays_stale(database):
+    responses = {
+        1: FetchedTweet("1", "healthy", DATE, None, "fetched fine", []),
+        # Fetched, but the API names an account that has no category mapping
+        3: FetchedTweet("3", "someone_else", DATE, None, "skipped", []),
+    }
+    found = {"healthy": _found(1), "unreachable": _found(2), "unmapped": _found(3), "quiet": _found()}
+
+    stats, fetched = database(lambda session_factory: _run_accounts(session_factory, responses, found))
+    assert stats["healthy"].succeeded and fetched["healthy"] is not None
+    # Nothing new is not a failure
+    assert stats["quiet"].succeeded and fetched["quiet"] is not None
+    for account in ("unreachable", "unmapped"):
+        assert not stats[account].succeeded
+        assert stats[account].errors == 1
+        assert fetched[account] is None
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+from src.database.models.models import Category
+from src.database.repositories.cache import QueryCache, cached
+from src.database.unit_of_work import UnitOfWork
+
+
+class _Table:
+    __tablename__ = "things"
+
+
+class _Repository:
+    """The least a repository needs for @cached, counts how often the query really runs"""
+    model = _Table
+
+    def __init__(self, cache, value="v1"):
+        self.cache = cache
+        self.value = value
+        self.reads = 0
+        self.reading = None
+
+    @cached(ttl=60)
+    async def get(self, key):
+        self.reads += 1
+        value = self.value
+        # Rows already read, the result is still on its way back
+        if self.reading is not None:
+            await self.reading.wait()
+        return [value, key]
+
+
+def test_entries_expire_after_their_ttl():
+    cache = QueryCache(default_ttl=0.05)
+    cache.set(("key", ()), "value", ("things",))
+    assert cache.get(("key", ())) == (True, "value")
+    time.sleep(0.06)
+    assert cache.get(("key", ())) == (False, None)
+    assert cache.stats()["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.set((key, ()), key, ("things",))
+    cache.get(("a", ()))
+    cache.set(("c", ()), "c", ("things",))
+    assert cache.get(("b", ()))[0] is False
+    assert cache.get(("a", ()))[0] is True
+    assert cache.get(("c", ()))[0] is True
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_only_entries_of_the_written_table():
+    cache = QueryCache()
+    cache.set(("a", ()), "a", ("things",))
+    cache.set(("b", ()), "b", ("other",))
+    cache.invalidate(["things"])
+    assert cache.get(("a", ()))[0] is False
+    assert cache.get(("b", ()))[0] is True
+
+
+def test_cached_method_reads_through_and_copies_lists():
+    async def main():
+        repo = _Repository(QueryCache())
+        first = await repo.get(1)
+        first.append("changed by the caller")
+        return repo.reads, await repo.get(1)
+
+    reads, second = asyncio.run(main())
+    assert reads == 1
+    assert second == ["v1", 1]
+
+
+def test_read_overlapping_an_invalidation_is_not_stored():
+    async def main():
+        cache = QueryCache()
+        repo = _Repository(cache)
+        repo.reading = asyncio.Event()
+        read = asyncio.create_task(repo.get(1))
+        await asyncio.sleep(0)
+        # A writer commits while the read is still running, the read may have seen the old rows
+        repo.value = "v2"
+        cache.invalidate(["things"])
+        repo.reading.set()
+        stale = await read
+        repo.reading = None
+        return stale, await repo.get(1), repo.reads, cache.stats()["stale_reads"]
+
+    stale, fresh, reads, stale_reads = asyncio.run(main())
+    assert stale == ["v1", 1]
+    assert fresh == ["v2", 1]
+    assert reads == 2
+    assert stale_reads == 1
+
+
+def test_unit_of_work_invalidates_on_commit_only(database):
+    async def work(session_factory):
+        cache = QueryCache()
+
+        async def categories():
+            async with UnitOfWork(session_factory, query_cache=cache) as uow:
+                return [category.name for category in await uow.categories.get_all_category_info()]
+
+        before = await categories()
+        async with UnitOfWork(session_factory, query_cache=cache) as uow:
+            await uow.categories.create(Category(name="tech", description="Tech", is_active=True))
+            # Only flushed so far, other sessions still read the old rows and so may the cache
+            during = await categories()
+        after = await categories()
+
+        try:
+            async with UnitOfWork(session_factory, query_cache=cache) as uow:
+                await uow.categories.create(Category(name="rolled back", description="Never stored", is_active=True))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        hits = cache.stats()["hits"]
+        after_rollback = await categories()
+        return before, during, after, after_rollback, cache.stats()["hits"] - hits
+
+    before, during, after, after_rollback, new_hits = database(work)
+    assert before == during == []
+    assert after == ["tech"]
+    # A rollback wrote nothing, the cached lookup is still served
+    assert after_rollback == ["tech"]
+    assert new_hits == 1
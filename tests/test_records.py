@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.services.crawler.records import FetchedTweet, tweet_rows
+from src.utils.common import parse_date, tweet_created_at
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("date_str, expected", [
+    ("Wed Oct 10 20:19:24 +0000 2018", _utc(2018, 10, 10, 20, 19, 24)),
+    ("Sat Feb 29 00:00:00 +0000 2020", _utc(2020, 2, 29, 0, 0, 0)),
+    ("Wed Oct 10 20:19:24 +0530 2018", _utc(2018, 10, 10, 14, 49, 24)),
+    ("Wed Oct 10 20:19:24 -0800 2018", _utc(2018, 10, 11, 4, 19, 24)),
+    ("Wed Oct 10 01:00:00 +0200 2018", _utc(2018, 10, 9, 23, 0, 0)),
+    # Off the fixed layout, handled by the strptime fallback
+    ("Tue Oct  9 20:19:24 +0000 2018", _utc(2018, 10, 9, 20, 19, 24)),
+    ("Wed Oct 10 20:19:24 +05:30 2018", _utc(2018, 10, 10, 14, 49, 24)),
+])
+def test_parse_date_valid(date_str, expected):
+    parsed = parse_date(date_str)
+    assert parsed == expected
+    assert parsed.utcoffset().total_seconds() == 0
+
+
+@pytest.mark.parametrize("date_str", [
+    "",
+    "2018-10-10T20:19:24Z",
+    "Wed Oct 10 20:19:24 +0000",
+    "Wed Foo 10 20:19:24 +0000 2018",
+    "Wed Oct 32 20:19:24 +0000 2018",
+    "Wed Feb 29 20:19:24 +0000 2019",
+    "Wed Oct 10 25:19:24 +0000 2018",
+    "Wed Oct 10 20:19:24 +00ab 2018",
+])
+def test_parse_date_malformed(date_str):
+    assert parse_date(date_str) is None
+
+
+@pytest.mark.parametrize("date_epoch, date_str, expected", [
+    # The epoch wins over the date string, even when they disagree
+    (1539202764, "Thu Jan 01 00:00:00 +0000 2015", _utc(2018, 10, 10, 20, 19, 24)),
+    (1539202764, "garbage", _utc(2018, 10, 10, 20, 19, 24)),
+    (0, "Wed Oct 10 20:19:24 +0000 2018", _utc(1970, 1, 1)),
+    (None, "Wed Oct 10 20:19:24 +0000 2018", _utc(2018, 10, 10, 20, 19, 24)),
+    (None, "garbage", None),
+    (None, None, None),
+    (None, "", None),
+])
+def test_tweet_created_at(date_epoch, date_str, expected):
+    assert tweet_created_at(date_epoch, date_str) == expected
+
+
+def _fetched(tweet_id, username, date="Wed Oct 10 20:19:24 +0000 2018", date_epoch=None):
+    return FetchedTweet(str(tweet_id), username, date, date_epoch, f"tweet {tweet_id}", [])
+
+
+@pytest.mark.parametrize("tweets, expected_ids, expected_skipped", [
+    ([_fetched(1, "Neovim")], [(1, 10)], 0),
+    # The API may spell the handle differently than it was stored
+    ([_fetched(1, "neovim"), _fetched(2, "NEOVIM")], [(1, 10), (1, 10)], 0),
+    ([_fetched(1, "Neovim"), _fetched(2, "unknown_account")], [(1, 10)], 1),
+    ([_fetched(1, "unknown_account"), _fetched(2, "other_unknown")], [], 2),
+    ([_fetched(1, "Neovim", date="garbage"), _fetched(2, "vim_tricks", date="garbage", date_epoch=1539202764)], [(2, 20)], 1),
+    ([], [], 0),
+])
+def test_tweet_rows(tweets, expected_ids, expected_skipped):
+    mapping = {"Neovim": (1, 10), "vim_tricks": (2, 20)}
+    rows, skipped = tweet_rows(tweets, mapping)
+    assert [(row["account_id"], row["category_id"]) for row in rows] == expected_ids
+    assert skipped == expected_skipped
+    assert all(row["created_at"].tzinfo is not None for row in rows)
@@ -0,0 +1,71 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.exceptions import InvalidCursorError
+from src.database.models.models import Tweet
+from src.database.repositories.repositories import TweetRepository
+
+
+def _rows(start, count, text="linux kernel release notes"):
+    return [
+        {
+            "twitter_id": str(start + index), "account_id": 1, "category_id": 1, "media_urls": [],
+            # Varying lengths give the rows different bm25 scores
+            "text": f"{text} {'padding ' * (index % 7)}", "created_at": datetime(2026, 1, 1) + timedelta(minutes=index)
+        }
+        for index in range(count)
+    ]
+
+
+def test_pages_do_not_skip_or_repeat_rows_when_the_index_changes(database):
+    async def work(session_factory):
+        async with session_factory() as session:
+            repo = TweetRepository(Tweet, session)
+            first_ids = await repo.insert_rows(_rows(1000, 60))
+            seen, cursor, inserted = [], None, 0
+            # Nine pages hold the 60 rows, a cursor that repeats rows would otherwise page forever
+            for _ in range(20):
+                page = await repo.search("linux", limit=7, cursor=cursor)
+                seen.extend(result.id for result in page.results)
+                if not page.next_cursor:
+                    return first_ids, seen
+                # Every insert changes the bm25 statistics of the rows still to come
+                await repo.insert_rows(_rows(5000 + inserted, 3, "linux linux desktop"))
+                inserted += 3
+                cursor = page.next_cursor
+            return first_ids, seen
+
+    first_ids, seen = database(work)
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == sorted(first_ids)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "bm90IGpzb24=",  # "not json"
+    base64.urlsafe_b64encode(b"[1.0, 2]").decode(),
+    base64.urlsafe_b64encode(b"{\"rank\": 1}").decode(),
+    base64.urlsafe_b64encode(b"[\"a\", \"b\", \"c\"]").decode(),
+    base64.urlsafe_b64encode(b"7").decode(),
+    base64.urlsafe_b64encode(b"[1.0, 2, 3]").decode()[:-3],
+])
+def test_malformed_cursor_raises_invalid_cursor(database, cursor):
+    async def work(session_factory):
+        async with session_factory() as session:
+            await TweetRepository(Tweet, session).search("linux", cursor=cursor)
+
+    with pytest.raises(InvalidCursorError):
+        database(work)
+
+
+def test_search_command_prints_invalid_cursor(database, capsys):
+    from src.services.cli.tools import SearchTweets
+
+    async def work(session_factory):
+        async with session_factory() as session:
+            await SearchTweets(TweetRepository(Tweet, session), "linux", None, None, None, 20, "garbage[").execute()
+
+    database(work)
+    assert "Invalid cursor 'garbage['" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+import pytest
+
+from src.utils import similarity
+
+TEXT = "Neovim 0.11 ships a built-in LSP client with faster startup and better completion"
+
+
+def _fingerprint(text):
+    return similarity.simhash(similarity.normalize_tokens(text))
+
+
+@pytest.mark.parametrize("max_distance", [similarity.MIN_BAND_DISTANCE, similarity.MAX_BAND_DISTANCE])
+def test_band_buckets_at_the_bounds_stay_below_the_media_flag(max_distance):
+    fingerprint = (1 << similarity.FINGERPRINT_BITS) - 1
+    buckets = similarity.band_buckets(fingerprint, max_distance)
+    assert len(buckets) == max_distance + 1
+    assert len(set(buckets)) == len(buckets)
+    for bucket in buckets:
+        assert 0 <= bucket < similarity.MEDIA_BUCKET_FLAG
+        assert similarity.to_signed(bucket) == bucket
+
+
+@pytest.mark.parametrize("max_distance", [similarity.MIN_BAND_DISTANCE - 1, similarity.MAX_BAND_DISTANCE + 1])
+def test_band_buckets_outside_the_bounds_raise(max_distance):
+    with pytest.raises(ValueError):
+        similarity.band_buckets(0, max_distance)
+
+
+@pytest.mark.parametrize("max_distance", [similarity.MIN_BAND_DISTANCE, 3, similarity.MAX_BAND_DISTANCE])
+def test_fingerprints_within_max_distance_share_a_bucket(max_distance):
+    fingerprint = _fingerprint(TEXT)
+    # Spread the flipped bits over the whole fingerprint, the worst case for banding
+    flipped = fingerprint
+    for index in range(max_distance):
+        flipped ^= 1 << (index * similarity.FINGERPRINT_BITS // max_distance)
+    assert similarity.hamming_distance(fingerprint, flipped) == max_distance
+    assert set(similarity.band_buckets(fingerprint, max_distance)) & set(similarity.band_buckets(flipped, max_distance))
+
+
+def test_same_text_cross_posted_is_within_distance():
+    repost = f"RT @neovim: {TEXT.upper()} https://t.co/abc123"
+    assert similarity.hamming_distance(_fingerprint(TEXT), _fingerprint(repost)) == 0
+
+
+def test_different_texts_are_far_apart():
+    other = "Linus Tech Tips reviews the new graphics card lineup and benchmarks every model in four games"
+    assert similarity.hamming_distance(_fingerprint(TEXT), _fingerprint(other)) > similarity.MAX_BAND_DISTANCE
+
+
+def test_media_fingerprint_ignores_size_and_format_parameters():
+    assert (
+        similarity.media_fingerprint(["https://pbs.twimg.com/media/abc.jpg?name=small"])
+        == similarity.media_fingerprint(["https://pbs.twimg.com/media/abc.jpg?name=large&format=png"])
+    )
+    assert similarity.media_fingerprint([]) is None